@@ -1,128 +1,229 @@
+import os
 import re
 import sys
+import time
+import threading
 import duckdb
 import pandas as pd
 from datetime import datetime
 from dateutil import parser
-from energy_agentic_ai.utils import normalize_datetime
+from energy_agentic_ai.utils import date_column_sql
+from energy_agentic_ai.agents.coalescing import SingleFlight, coalesced
+from energy_agentic_ai.agents.query_compiler import QueryCompiler, PartitionIndex, OUTAGE_METRICS
+from energy_agentic_ai.slow_log import current_trace
 
 sys.path.append('/content')
 
+
+def _parquet_source(path):
+    """read_parquet over a Hive-partitioned dataset directory written by DataAgent.write_partitioned."""
+    pattern = os.path.join(path, "**", "*.parquet").replace("'", "''")
+    return f"read_parquet('{pattern}', hive_partitioning = true)"
+
+
+def _as_regions(region):
+    """Accept a single region code or a list of codes."""
+    if isinstance(region, (list, tuple)):
+        return [r for r in region if r]
+    return [region] if region else []
+
+
 # -----------------------------------------------------------------------------------
 #  This class analyses both structured and unstructured log data.
 # -----------------------------------------------------------------------------------
 class AnalysisAgent:
-    def __init__(self, df_consumption, df_outages=None):
-        self.df_consumption = df_consumption
-        self.df_outages = df_outages
-        self.con = duckdb.connect()
-        self.con.register('df_consumption_var', self.df_consumption)
-        if self.df_outages is not None:
-            self.con.register('df_outages_var', self.df_outages)
+    def __init__(self, df_consumption, df_outages=None, threads=None, memory_limit=None):
+        """
+        One in-memory DuckDB database shared by all threads; each thread
+        queries through its own cursor. `threads` and `memory_limit`
+        (e.g. "2GB") are passed to DuckDB when given.
+        """
+        config = {}
+        if threads:
+            config["threads"] = threads
+        if memory_limit:
+            config["memory_limit"] = memory_limit
+        self.con = duckdb.connect(config=config)
+        self._con_lock = threading.Lock()
+        self._local = threading.local()
+        self._version = 0
+        self._outage_demand_version = None
+        self._flight = SingleFlight()
+        self.compiler = QueryCompiler()
+        self.df_consumption = None
+        self.df_outages = None
+        self.reload(df_consumption, df_outages)
+
+    # -------------------------------
+    # Snapshots & cursors
+    # -------------------------------
+    def _cursor(self):
+        """Per-thread cursor on the shared database."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            with self._con_lock:
+                cursor = self.con.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def reload(self, df_consumption, df_outages=None):
+        """
+        Load a new data snapshot. Tables are written under a new version and the
+        df_consumption_var / df_outages_var views are swapped atomically, so a
+        query that is already running keeps reading the previous snapshot.
+        Dates are parsed once here into a `Day DATE` column and rows are sorted
+        by (Region, Day) so per-query filters prune on plain columns.
+
+        Either argument may instead be the directory of a Hive-partitioned
+        Parquet dataset (DataAgent.write_partitioned). Consumption is then
+        queried in place: its file list is indexed once per snapshot, each
+        compiled query reads only the files of its regions and months, and
+        per-row-group Date statistics skip the rest. Outages are small and
+        are loaded into memory.
+        """
+        if isinstance(df_outages, str):
+            df_outages = self._cursor().execute(
+                f"SELECT * EXCLUDE (year, month) FROM {_parquet_source(df_outages)} ORDER BY Date"
+            ).fetchdf()
+
+        outages = None
+        if df_outages is not None:
+            # assign() leaves the caller's frame untouched; Report_Text is not copied under copy-on-write
+            outages = df_outages.assign(Duration_hr=df_outages["Report_Text"].apply(self.extract_duration))
+            if pd.api.types.is_string_dtype(outages["Date"]) or pd.api.types.is_object_dtype(outages["Date"]):
+                outages = outages.assign(Date=pd.to_datetime(outages["Date"], dayfirst=True, errors="coerce"))
+
+        with self._con_lock:
+            self._version += 1
+            version = self._version
+            cur = self.con.cursor()
+            partitioned = isinstance(df_consumption, str)
+            if partitioned:
+                cur.execute(f"""
+                    CREATE VIEW consumption_v{version} AS
+                    SELECT *, Date AS Day
+                    FROM {_parquet_source(df_consumption)}
+                """)
+            else:
+                cur.register("consumption_src", df_consumption)
+                cur.execute(f"""
+                    CREATE TABLE consumption_v{version} AS
+                    SELECT *, {date_column_sql(df_consumption)} AS Day
+                    FROM consumption_src
+                    ORDER BY Region, Day
+                """)
+            cur.execute(f"CREATE OR REPLACE VIEW df_consumption_var AS SELECT * FROM consumption_v{version}")
+            self.compiler.set_partitions({"df_consumption_var": PartitionIndex(df_consumption)} if partitioned else None)
+            if outages is not None:
+                cur.register("outages_src", outages)
+                cur.execute(f"""
+                    CREATE TABLE outages_v{version} AS
+                    SELECT *, CAST(Date AS DATE) AS Day
+                    FROM outages_src
+                    ORDER BY Region, Day
+                """)
+                cur.execute(f"CREATE OR REPLACE VIEW df_outages_var AS SELECT * FROM outages_v{version}")
+            else:
+                cur.execute("DROP VIEW IF EXISTS df_outages_var")
+            # Keep the previous snapshot for in-flight readers, drop older ones
+            if version > 2:
+                for name in ("consumption", "outages", "outage_demand", "demand_days"):
+                    self._drop_relation(cur, f"{name}_v{version - 2}")
+            cur.close()
+            self.df_consumption = df_consumption
+            self.df_outages = df_outages
+
+    def _fetch(self, sql, params=None):
+        """Run a query on this thread's cursor; reported to the slow-query log when the request is traced."""
+        trace = current_trace()
+        if trace is None:
+            return self._cursor().execute(sql, params).fetchdf()
+        start = time.perf_counter()
+        df = self._cursor().execute(sql, params).fetchdf()
+        trace.add_sql(sql, params, time.perf_counter() - start, len(df), explain=lambda: self._explain(sql, params))
+        return df
+
+    def _explain(self, sql, params=None):
+        """DuckDB EXPLAIN ANALYZE profile of a query (re-runs it)."""
+        rows = self._cursor().execute("EXPLAIN ANALYZE " + sql, params).fetchall()
+        return "\n".join(row[-1] for row in rows)
+
+    @staticmethod
+    def _drop_relation(cur, name):
+        """DROP a snapshot table, or view when it was read from Parquet."""
+        row = cur.execute(
+            "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [name]
+        ).fetchone()
+        if row:
+            cur.execute(f"DROP {'VIEW' if row[0] == 'VIEW' else 'TABLE'} {name}")
+
+    # -------------------------------
+    # Compiled intent queries
+    # -------------------------------
+    def run_intent(self, intent):
+        """
+        Compile a parsed intent (action, region/regions, year or start/end
+        dates, granularity) into one SQL plan and execute it. Identical
+        concurrent queries share one execution.
+        Returns a DataFrame with the plan's columns.
+        """
+        compiled = self.compiler.compile(intent)
+        if compiled.empty or (compiled.action in OUTAGE_METRICS and self.df_outages is None):
+            return pd.DataFrame(columns=compiled.columns)
+        return self._flight.do(("run_intent",) + compiled.key, self._execute, compiled)
+
+    def _execute(self, compiled):
+        return self._fetch(compiled.sql, compiled.params)
+
+    def get_compiler_stats(self):
+        return self.compiler.get_stats()
 
     # -------------------------------
     # Demand Queries
     # -------------------------------
+    def _demand_intent(self, action, region, start_date, end_date):
+        return {"action": action, "regions": _as_regions(region), "start_date": start_date, "end_date": end_date}
+
     def get_all_demands(self, region=None, start_date=None, end_date=None):
-        query = "SELECT Date, Region, Demand_MW as Demand FROM df_consumption_var"
-        conditions = []
-        if region:
-            conditions.append(f"Region = '{region}'")
-        if start_date and end_date:
-            conditions.append(
-                f"STRPTIME(Date, '%d-%b-%Y') BETWEEN STRPTIME('{start_date}', '%d-%b-%Y') "
-                f"AND STRPTIME('{end_date}', '%d-%b-%Y')"
-            )
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += " ORDER BY STRPTIME(Date, '%d-%b-%Y') ASC"
-
-        result = self.con.execute(query).fetchdf()
+        result = self.run_intent(self._demand_intent("all_demands", region, start_date, end_date))
         if result.empty:
             return None
-
-        result["Date"] = result["Date"].apply(normalize_datetime)
         return result.to_dict(orient="records")
 
     def get_peak_demand(self, region=None, start_date=None, end_date=None):
-        query = "SELECT Date, Region, Demand_MW as PeakDemand FROM df_consumption_var"
-        conditions = []
-        if region:
-            conditions.append(f"Region = '{region}'")
-        if start_date and end_date:
-            conditions.append(
-                f"STRPTIME(Date, '%d-%b-%Y') BETWEEN STRPTIME('{start_date}', '%d-%b-%Y') "
-                f"AND STRPTIME('{end_date}', '%d-%b-%Y')"
-            )
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += " ORDER BY Demand_MW DESC LIMIT 1"
-
-        result = self.con.execute(query).fetchdf()
+        result = self.run_intent(self._demand_intent("peak_demand", region, start_date, end_date))
         if result.empty:
             return None
-        row = result.iloc[0]
-        return {
-            "Date": normalize_datetime(row["Date"]),
-            "Region": row["Region"],
-            "PeakDemand": row["PeakDemand"]
-        }
+        records = result.to_dict(orient="records")
+        return records[0] if len(records) == 1 and "Period" not in result else records
 
     def get_total_demand(self, region=None, start_date=None, end_date=None):
         """Compute total demand (SUM)."""
-        query = "SELECT Region, SUM(Demand_MW) AS TotalDemand FROM df_consumption_var"
-        conditions = []
-        if region:
-            conditions.append(f"Region = '{region}'")
-        if start_date and end_date:
-            conditions.append(
-                f"STRPTIME(Date, '%d-%b-%Y') BETWEEN STRPTIME('{start_date}', '%d-%b-%Y') "
-                f"AND STRPTIME('{end_date}', '%d-%b-%Y')"
-            )
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += " GROUP BY Region"
-
-        df = self.con.execute(query).fetchdf()
-        if df.empty:
+        result = self.run_intent(self._demand_intent("total_demand", region, start_date, end_date))
+        if result.empty:
             return None
-        return df.to_dict(orient="records")
+        return result.to_dict(orient="records")
 
     def get_average_demand(self, region=None, start_date=None, end_date=None):
         """Compute average demand (AVG)."""
-        query = "SELECT Region, AVG(Demand_MW) AS AverageDemand FROM df_consumption_var"
-        conditions = []
-        if region:
-            conditions.append(f"Region = '{region}'")
-        if start_date and end_date:
-            conditions.append(
-                f"STRPTIME(Date, '%d-%b-%Y') BETWEEN STRPTIME('{start_date}', '%d-%b-%Y') "
-                f"AND STRPTIME('{end_date}', '%d-%b-%Y')"
-            )
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += " GROUP BY Region"
-
-        df = self.con.execute(query).fetchdf()
-        if df.empty:
+        result = self.run_intent(self._demand_intent("average_demand", region, start_date, end_date))
+        if result.empty:
             return None
-        return df.to_dict(orient="records")
+        return result.to_dict(orient="records")
 
-    def get_regional_peak_summary(self):
-        """Returns a DataFrame with Region, PeakDemand, and Date of peak."""
-        query = """
-            SELECT Region, Demand_MW as PeakDemand, Date
-            FROM df_consumption_var AS t1
-            WHERE Demand_MW = (
-                SELECT MAX(Demand_MW)
-                FROM df_consumption_var AS t2
-                WHERE t2.Region = t1.Region
-            )
-            ORDER BY Region
+    def get_top_peaks(self, region=None, n=1, start_date=None, end_date=None, per=None):
         """
-        df = self.con.execute(query).fetchdf()
-        df["Date"] = df["Date"].apply(normalize_datetime)
-        return df
+        Top n demand days per region, optionally within start..end and per
+        "month", "season" or "year". Ranked by the day's peak demand, ties
+        go to the earlier day. Returns a DataFrame with Region, [Period,]
+        Date, PeakDemand and Rank.
+        """
+        intent = self._demand_intent("top_peaks", region, start_date, end_date)
+        return self.run_intent(dict(intent, top_n=n, granularity=per))
+
+    def get_regional_peak_summary(self, start_date=None, end_date=None):
+        """Returns a DataFrame with Region, PeakDemand, and Date of peak."""
+        return self.get_top_peaks(start_date=start_date, end_date=end_date)[["Region", "PeakDemand", "Date"]]
 
     # -------------------------------
     # Outage Queries
@@ -150,54 +251,142 @@ class AnalysisAgent:
     def summarize_outages_by_region(self, region=None, year=None, start_date=None, end_date=None):
         if self.df_outages is None or self.df_outages.empty:
             return pd.DataFrame(columns=["Region", "TotalOutages", "TotalHours"])
+        return self.run_intent({
+            "action": "structured_outage_summary",
+            "region": region,
+            "year": year,
+            "start_date": start_date,
+            "end_date": end_date,
+        })
 
-        df = self.df_outages.copy()
-        df["Duration_hr"] = df["Report_Text"].apply(self.extract_duration)
-        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
+    def get_average_outage_duration(self, region=None, year=None):
+        if self.df_outages is None or self.df_outages.empty:
+            return pd.DataFrame(columns=["Region", "AverageOutageDuration"])
+        return self.run_intent({"action": "average_outage_duration", "region": region, "year": year})
 
-        query = """
-            SELECT Region,
-                  COUNT(*) AS TotalOutages,
-                  SUM(Duration_hr) AS TotalHours
-            FROM df
+    # -------------------------------
+    # Outage / Demand Join
+    # -------------------------------
+    def _ensure_outage_demand(self):
         """
+        Materialize, once per snapshot:
+          outage_demand_var  one row per outage with the region's demand on that
+                             day (ASOF join: latest consumption day <= outage day)
+          demand_days_var    one row per consumption day with its outage count/hours
+        """
+        if self._outage_demand_version == self._version:
+            return True
+        with self._con_lock:
+            version = self._version
+            if self._outage_demand_version == version:
+                return True
+            if self.df_outages is None:
+                return False
+            cur = self.con.cursor()
+            cur.execute(f"""
+                CREATE OR REPLACE TABLE outage_demand_v{version} AS
+                WITH c AS (
+                    SELECT Region, Day, Demand_MW, Supply_MW FROM consumption_v{version}
+                ),
+                o AS (
+                    SELECT Region, Day, Duration_hr, Report_Text
+                    FROM outages_v{version}
+                    WHERE Day IS NOT NULL
+                )
+                SELECT o.Region, o.Day AS OutageDay, c.Day AS DemandDay,
+                       c.Demand_MW, c.Supply_MW, o.Duration_hr, o.Report_Text
+                FROM o ASOF LEFT JOIN c
+                  ON o.Region = c.Region AND o.Day >= c.Day
+            """)
+            cur.execute(f"""
+                CREATE OR REPLACE TABLE demand_days_v{version} AS
+                WITH c AS (
+                    SELECT Region, Day, Demand_MW, Supply_MW FROM consumption_v{version}
+                ),
+                o AS (
+                    SELECT Region, Day, COUNT(*) AS Outages, SUM(Duration_hr) AS OutageHours
+                    FROM outages_v{version}
+                    WHERE Day IS NOT NULL
+                    GROUP BY ALL
+                )
+                SELECT c.Region, c.Day, c.Demand_MW, c.Supply_MW,
+                       COALESCE(o.Outages, 0) AS Outages, COALESCE(o.OutageHours, 0) AS OutageHours
+                FROM c LEFT JOIN o ON c.Region = o.Region AND c.Day = o.Day
+            """)
+            cur.execute(f"CREATE OR REPLACE VIEW outage_demand_var AS SELECT * FROM outage_demand_v{version}")
+            cur.execute(f"CREATE OR REPLACE VIEW demand_days_var AS SELECT * FROM demand_days_v{version}")
+            cur.close()
+            self._outage_demand_version = version
+            return True
 
-        conditions = []
-        if region:
-            conditions.append(f"Region = '{region}'")
-        if start_date and end_date:
-            conditions.append(
-                f"Date BETWEEN STRPTIME('{start_date}', '%d-%b-%Y') AND STRPTIME('{end_date}', '%d-%b-%Y')"
-            )
+    def _day_conditions(self, column, region=None, start_date=None, end_date=None):
+        """Parameterized Region / date-range predicates on a DATE column."""
+        conditions, params = [], []
+        regions = _as_regions(region)
+        if regions:
+            conditions.append(f"Region IN ({', '.join('?' * len(regions))})")
+            params += regions
+        date_range = self.compiler.date_range_of({"start_date": start_date, "end_date": end_date})
+        if date_range:
+            conditions.append(f"{column} BETWEEN ? AND ?")
+            params += list(date_range)
+        return conditions, params
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+    @coalesced
+    def get_outage_demand(self, region=None, start_date=None, end_date=None, max_lag_days=0):
+        """
+        Demand in the outage's region on the day of each outage, read from the
+        materialized as-of join. max_lag_days allows falling back to the most
+        recent earlier consumption day when the outage day has no reading.
+        """
+        columns = ["Date", "Region", "Demand", "DemandDate", "Duration_hr"]
+        if not self._ensure_outage_demand():
+            return pd.DataFrame(columns=columns)
 
-        query += " GROUP BY Region ORDER BY Region"
+        conditions, params = self._day_conditions("OutageDay", region, start_date, end_date)
+        conditions.append("DemandDay IS NOT NULL AND date_diff('day', DemandDay, OutageDay) <= ?")
+        params.append(int(max_lag_days))
+        query = f"""
+            SELECT strftime(OutageDay, '%d-%b-%Y') AS Date, Region, Demand_MW AS Demand,
+                   strftime(DemandDay, '%d-%b-%Y') AS DemandDate, Duration_hr
+            FROM outage_demand_var
+            WHERE {" AND ".join(conditions)}
+            ORDER BY OutageDay, Region
+        """
+        return self._fetch(query, params)
 
-        result = duckdb.query_df(df, "df", query).to_df()
-        return result
+    @coalesced
+    def compare_outage_day_demand(self, region=None, start_date=None, end_date=None):
+        """
+        Per region: average and peak demand on days with at least one outage
+        versus days without, in a single pass over the materialized join.
+        """
+        columns = ["Region", "OutageDays", "NormalDays", "AvgDemandOutageDays", "AvgDemandNormalDays",
+                   "PeakDemandOutageDays", "PeakDemandNormalDays", "AvgDemandChangePct"]
+        if not self._ensure_outage_demand():
+            return pd.DataFrame(columns=columns)
 
-    def get_average_outage_duration(self, region=None, year=None):
-        if self.df_outages is None or self.df_outages.empty:
-            return pd.DataFrame(columns=["Region", "AverageOutageDuration"])
-        df = self.df_outages.copy()
-        df["Duration_hr"] = df["Report_Text"].apply(self.extract_duration)
-        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
-        if region:
-            df = df[df["Region"] == region]
-        if year:
-            df = df[df["Date"].dt.year == year]
-        if df.empty:
-            return pd.DataFrame(columns=["Region", "AverageOutageDuration"])
-        query = """
-            SELECT Region, AVG(Duration_hr) AS AverageOutageDuration
-            FROM df
+        conditions, params = self._day_conditions("Day", region, start_date, end_date)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        query = f"""
+            SELECT Region,
+                   COUNT(*) FILTER (WHERE Outages > 0) AS OutageDays,
+                   COUNT(*) FILTER (WHERE Outages = 0) AS NormalDays,
+                   AVG(Demand_MW) FILTER (WHERE Outages > 0) AS AvgDemandOutageDays,
+                   AVG(Demand_MW) FILTER (WHERE Outages = 0) AS AvgDemandNormalDays,
+                   MAX(Demand_MW) FILTER (WHERE Outages > 0) AS PeakDemandOutageDays,
+                   MAX(Demand_MW) FILTER (WHERE Outages = 0) AS PeakDemandNormalDays,
+                   100.0 * (AVG(Demand_MW) FILTER (WHERE Outages > 0)
+                            / NULLIF(AVG(Demand_MW) FILTER (WHERE Outages = 0), 0) - 1) AS AvgDemandChangePct
+            FROM demand_days_var{where}
             GROUP BY Region
             ORDER BY Region
         """
-        result = duckdb.query_df(df, "df", query).to_df()
-        return result
+        return self._fetch(query, params)
+
+    def get_coalescing_stats(self):
+        """How many identical concurrent queries were served by a single execution."""
+        return self._flight.get_stats()
 
     # -------------------------------
     # Anomaly Detection Placeholder
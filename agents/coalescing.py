@@ -0,0 +1,91 @@
+import re
+import functools
+import threading
+
+# -----------------------------------------------------------------------------------
+#  Single-flight request coalescing.
+#  Concurrent calls with the same key wait on one in-flight computation and
+#  share its result (or exception). Nothing is cached once the call finishes.
+# -----------------------------------------------------------------------------------
+
+def normalize_query(query):
+    """Lower-case and collapse whitespace so trivially different phrasings share a key."""
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless a call with the same key is already
+        running, in which case wait for it and return its result.
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self):
+        """Counters: calls received, computations executed, and calls saved by coalescing."""
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+
+def _freeze(value):
+    """Make list arguments (e.g. several regions) usable in a coalescing key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def coalesced(method):
+    """
+    Method decorator: coalesce concurrent calls with identical arguments
+    through the instance's `_flight` SingleFlight.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, _freeze(args), _freeze(sorted(kwargs.items())))
+        return self._flight.do(key, method, self, *args, **kwargs)
+    return wrapper
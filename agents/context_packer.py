@@ -0,0 +1,118 @@
+import re
+
+# -----------------------------------------------------------------------------------
+#  Packs retrieved outage reports into a compact, token-budgeted prompt context.
+#  Near-identical templated narratives are deduplicated and grouped by
+#  (Date, Region) with counts, most relevant group first.
+# -----------------------------------------------------------------------------------
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return max(1, (len(text) + 3) // 4)
+
+
+class ContextPacker:
+    def __init__(self, token_budget=400, max_report_chars=160):
+        self.token_budget = token_budget
+        self.max_report_chars = max_report_chars
+
+    @staticmethod
+    def _report_text(doc):
+        content = doc.page_content
+        if ", Report: " in content:
+            return content.split(", Report: ", 1)[1].strip()
+        return content.strip()
+
+    @staticmethod
+    def _signature(text):
+        """Template signature: lower-case, numbers masked, punctuation dropped."""
+        text = re.sub(r"\d+(?:\.\d+)?", "#", text.lower())
+        return re.sub(r"[^a-z# ]+", " ", re.sub(r"\s+", " ", text)).strip()
+
+    def group(self, docs):
+        """
+        Returns a list of groups in retrieval order:
+          {"Date", "Region", "events": [(report_text, count), ...], "docs": n}
+        """
+        groups = {}
+        for doc in docs:
+            key = (doc.metadata.get("Date"), doc.metadata.get("Region"))
+            group = groups.setdefault(key, {"Date": key[0], "Region": key[1], "events": {}, "docs": 0})
+            text = self._report_text(doc)
+            signature = self._signature(text)
+            if signature in group["events"]:
+                group["events"][signature][1] += 1
+            else:
+                group["events"][signature] = [text, 1]
+            group["docs"] += 1
+
+        return [
+            {**g, "events": [tuple(event) for event in g["events"].values()]}
+            for g in groups.values()
+        ]
+
+    def _format_group(self, group):
+        events = []
+        for text, count in group["events"]:
+            if len(text) > self.max_report_chars:
+                text = text[: self.max_report_chars - 3].rstrip() + "..."
+            events.append(f"{count}x {text}" if count > 1 else text)
+        return f"- {group['Date'] or 'N/A'} | {group['Region'] or 'N/A'} | " + " / ".join(events)
+
+    def _fit_group(self, group, budget):
+        """
+        (line, reports) for the leading events of a group that fit in `budget`
+        tokens. When even the first event does not fit, its text is cut down.
+        """
+        for n in range(len(group["events"]), 0, -1):
+            events = group["events"][:n]
+            line = self._format_group({**group, "events": events})
+            if estimate_tokens(line) + 1 <= budget:
+                return line, sum(count for _, count in events)
+        line = self._format_group({**group, "events": group["events"][:1]})
+        max_chars = max(4, (budget - 1) * 4)
+        if len(line) > max_chars:
+            line = line[: max_chars - 3].rstrip() + "..."
+        return line, group["events"][0][1]
+
+    def pack(self, docs):
+        """
+        Returns (context_text, stats). Groups are added in retrieval order until
+        the token budget is reached; the remainder is summarized as a count.
+        A first group larger than the whole budget keeps only the events that
+        fit, and its dropped reports are counted in the remainder.
+        """
+        groups = self.group(docs)
+        lines = []
+        used = 0
+        packed_docs = 0
+        for group in groups:
+            line = self._format_group(group)
+            cost = estimate_tokens(line) + 1
+            if not lines and cost > self.token_budget:
+                line, reports = self._fit_group(group, self.token_budget)
+                lines.append(line)
+                used += estimate_tokens(line) + 1
+                packed_docs += reports
+                continue
+            if lines and used + cost > self.token_budget:
+                break
+            lines.append(line)
+            used += cost
+            packed_docs += group["docs"]
+
+        omitted_groups = len(groups) - len(lines)
+        omitted_docs = len(docs) - packed_docs
+        if omitted_groups:
+            lines.append(f"(+{omitted_groups} more date/region groups, {omitted_docs} reports omitted)")
+        elif omitted_docs:
+            lines.append(f"(+{omitted_docs} reports omitted)")
+
+        context = "\n".join(lines)
+        stats = {
+            "docs": len(docs),
+            "groups": len(groups),
+            "packed_groups": len(groups) - omitted_groups,
+            "tokens": estimate_tokens(context) if context else 0,
+        }
+        return context, stats
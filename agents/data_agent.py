@@ -1,21 +1,313 @@
 import os
+import re
 import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from dateutil import parser
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from energy_agentic_ai.utils import normalize_datetime
+from energy_agentic_ai.utils import normalize_datetime, date_column_sql
+from energy_agentic_ai.agents.query_compiler import month_range_condition
 
 sys.path.append('/content')
 
+# Hive partition columns of the Parquet layout. Outage Region values are free
+# text ("MRO/RF", "TRE,WECC"), so outages are partitioned by date only.
+CONSUMPTION_PARTITIONS = ("Region", "year", "month")
+OUTAGE_PARTITIONS = ("year", "month")
+
+# Compact in-memory schema enforced on load. "int32" columns are signed and
+# share one type per frame: all of them are widened to int64 when any value
+# does not fit, so Supply_MW - Demand_MW never wraps (see _compact_integers).
+CONSUMPTION_SCHEMA = {"Date": "date32", "Region": "category", "Demand_MW": "int32", "Supply_MW": "int32"}
+OUTAGE_SCHEMA = {"Date": "date32", "Region": "category", "Report_Text": "string"}
+
+# Date layouts recognized per file by detect_date_formats(), in order of preference
+DATE_FORMATS = (
+    "%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d",
+    "%d-%b-%Y", "%d %b %Y", "%d %B %Y", "%b %d %Y", "%B %d %Y", "%d-%m-%Y", "%m-%d-%Y",
+    "%d/%m/%y", "%m/%d/%y", "%d/%m/%Y %H:%M", "%m/%d/%Y %H:%M",
+)
+
+
+def _parse_dates(series):
+    """normalize_datetime once per distinct value, then one vectorized conversion to date32."""
+    import pyarrow as pa
+
+    if series.dtype == pd.ArrowDtype(pa.date32()):
+        # Already normalized (ingest_files)
+        return series
+    distinct = {value: normalize_datetime(value) for value in pd.unique(series.dropna())}
+    parsed = pd.to_datetime(series.map(distinct), format="%d-%b-%Y", errors="coerce")
+    days = pa.array(parsed.dt.date, type=pa.date32(), from_pandas=True)
+    return pd.Series(pd.array(days, dtype=pd.ArrowDtype(pa.date32())), index=series.index, name=series.name)
+
+
+def _compact_integers(df, columns):
+    """
+    Signed int32 for every column when all values fit, otherwise int64 for
+    all of them (never unsigned). Columns with missing values become float32.
+    """
+    values = {column: pd.to_numeric(df[column]) for column in columns}
+    integers = {column: series for column, series in values.items() if not series.isna().any()}
+    info = np.iinfo("int32")
+    fits = all(series.empty or (series.min() >= info.min and series.max() <= info.max)
+               for series in integers.values())
+    dtype = "int32" if fits else "int64"
+    return {column: series.astype(dtype if column in integers else "float32") for column, series in values.items()}
+
+
+def apply_schema(df, schema):
+    """Returns df with every schema column cast to its compact dtype; other columns are left as loaded."""
+    import pyarrow as pa
+
+    missing = [column for column in schema if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    columns = {}
+    for column, kind in schema.items():
+        if kind == "date32":
+            columns[column] = _parse_dates(df[column])
+        elif kind == "category":
+            columns[column] = df[column].astype("category")
+        elif kind == "int32":
+            continue
+        elif kind == "float32":
+            columns[column] = pd.to_numeric(df[column]).astype("float32")
+        elif kind == "string":
+            columns[column] = df[column].astype(pd.ArrowDtype(pa.string()))
+        else:
+            raise ValueError(f"Unknown schema type: {kind}")
+    columns.update(_compact_integers(df, [column for column, kind in schema.items() if kind == "int32"]))
+    return df.assign(**columns)
+
+
+def write_partitioned_dataset(output_dir, consumption_df=None, outage_df=None, row_group_size=122880):
+    """
+    Write the frames as Hive-partitioned Parquet:
+      {output_dir}/consumption/Region=ERCO/year=2023/month=7/data_0.parquet
+      {output_dir}/outages/year=2023/month=7/data_0.parquet
+    Rows are sorted by Date inside every file and each row group carries
+    min/max statistics, so DuckDB skips partitions and row groups outside
+    a query's filters. Existing data under output_dir is replaced.
+    """
+    import duckdb
+
+    con = duckdb.connect()
+    try:
+        for name, df, partitions, order in (
+            ("consumption", consumption_df, CONSUMPTION_PARTITIONS, "Region, Date"),
+            ("outages", outage_df, OUTAGE_PARTITIONS, "Date"),
+        ):
+            if df is None:
+                continue
+            target = os.path.join(output_dir, name)
+            os.makedirs(target, exist_ok=True)
+            day = date_column_sql(df)
+            con.register(f"{name}_src", df)
+            con.execute(f"""
+                COPY (
+                    SELECT * REPLACE ({day} AS Date), year({day}) AS year, month({day}) AS month
+                    FROM {name}_src
+                    ORDER BY {order}
+                ) TO '{target.replace("'", "''")}'
+                (FORMAT PARQUET, PARTITION_BY ({", ".join(partitions)}),
+                 ROW_GROUP_SIZE {int(row_group_size)}, OVERWRITE TRUE)
+            """)
+    finally:
+        con.close()
+    print(f"✅ Partitioned Parquet dataset written to {output_dir}.")
+    return output_dir
+
+
+# -------------------------------
+# Multi-file ingestion
+# -------------------------------
+def resolve_sources(source, pattern="*.csv"):
+    """
+    Expand one source into a list of inputs: a file-like object (uploads),
+    a path, a glob ("data/consumption/*.csv", "**" allowed), a directory
+    (every `pattern` file below it) or a list of any of these.
+    """
+    import glob
+
+    if source is None:
+        return []
+    if hasattr(source, "read"):
+        return [source]
+    if isinstance(source, (list, tuple)):
+        return [item for part in source for item in resolve_sources(part, pattern)]
+    path = os.fspath(source)
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+    if glob.has_magic(path):
+        return sorted(glob.glob(path, recursive=True))
+    return [path]
+
+
+def _value_shapes(values):
+    """Shape of every date string: 3+ digit runs -> '#', other digit runs -> '9', words -> 'a'."""
+    import pyarrow.compute as pc
+
+    shapes = pc.replace_substring_regex(values, r"\d{3,}", "#")
+    shapes = pc.replace_substring_regex(shapes, r"\d+", "9")
+    return pc.replace_substring_regex(shapes, r"[A-Za-z]+", "a")
+
+
+def _format_shape(fmt):
+    """Shape a strptime format produces, in _value_shapes() terms ('%m/%d/%Y' -> '9/9/#')."""
+    shape = re.sub(r"%[bB]", "@", re.sub(r"%[dmyHMS]", "9", fmt.replace("%Y", "#")))
+    return re.sub(r"[A-Za-z]+", "a", shape).replace("@", "a")
+
+
+def detect_date_formats(values):
+    """
+    ({shape: format}, shapes) for an Arrow string array of dates from one
+    file. Values are grouped by shape, so '7/13/2021' and '01/09/2020'
+    share '9/9/#' while '2023-03-28 00:00:00' is separate, and each shape
+    gets the first DATE_FORMATS entry of that shape parsing all its values.
+    Day-first is tried before month-first, so a shape that is ambiguous
+    throughout keeps normalize_datetime's dayfirst reading. Shapes no
+    format covers map to None and go through normalize_datetime.
+    """
+    import pyarrow.compute as pc
+
+    shapes = _value_shapes(values)
+    formats = {}
+    for shape in pc.unique(shapes.drop_null()).to_pylist():
+        group = pc.unique(values.filter(pc.equal(shapes, shape)))
+        formats[shape] = next(
+            (fmt for fmt in DATE_FORMATS
+             if _format_shape(fmt) == shape
+             and pc.strptime(group, fmt, unit="s", error_is_null=True).null_count == 0),
+            None,
+        )
+    return formats, shapes
+
+
+def _arrow_dates(values):
+    """One file's date strings -> date32, parsed with the formats detected for that file."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    formats, shapes = detect_date_formats(values)
+    parsed = []
+    for shape, fmt in formats.items():
+        if fmt is None:
+            distinct = {value: normalize_datetime(value)
+                        for value in pc.unique(values.filter(pc.equal(shapes, shape))).to_pylist()}
+            normalized = pa.array([distinct.get(value) for value in values.to_pylist()], type=pa.string())
+            days = pc.strptime(normalized, "%d-%b-%Y", unit="s", error_is_null=True)
+        else:
+            days = pc.strptime(values, fmt, unit="s", error_is_null=True)
+        parsed.append(pc.if_else(pc.equal(shapes, shape), days, None))
+    if not parsed:
+        return pa.nulls(len(values), type=pa.date32())
+    return pc.cast(pc.coalesce(*parsed), pa.date32())
+
+
+def read_csv_file(source, date_column="Date"):
+    """One CSV as an Arrow table with `date_column` normalized to date32 using that file's own formats."""
+    import pyarrow as pa
+    from pyarrow import csv
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    if hasattr(source, "read") and isinstance(source.read(0), str):
+        # Text-mode handles (open(path)) -> bytes for the Arrow reader
+        source = pa.BufferReader(source.read().encode("utf-8"))
+    table = csv.read_csv(
+        source,
+        parse_options=csv.ParseOptions(newlines_in_values=True),
+        convert_options=csv.ConvertOptions(column_types={date_column: pa.string()}),
+    )
+    if date_column in table.column_names:
+        index = table.column_names.index(date_column)
+        values = table.column(index).combine_chunks()
+        table = table.set_column(index, date_column, _arrow_dates(values))
+    return table
+
+
+def ingest_files(source, workers=None, executor="thread", pattern="*.csv"):
+    """
+    Read every file resolve_sources() finds into one Arrow table.
+    Files are parsed concurrently: "thread" (default; the Arrow CSV reader
+    and date kernels release the GIL) or "process" for a ProcessPoolExecutor
+    (paths only; file objects are read in the calling process). Dates are
+    normalized per file, then the tables are concatenated without copying
+    their buffers. All files must have the same columns; a column inferred
+    as int in one file and float in another is widened.
+    """
+    import pyarrow as pa
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+    sources = resolve_sources(source, pattern)
+    if not sources:
+        raise FileNotFoundError(f"No input files match {source!r}.")
+
+    if len(sources) == 1 or workers == 1:
+        tables = [read_csv_file(item) for item in sources]
+    else:
+        workers = workers or min(len(sources), os.cpu_count() or 1)
+        paths = [item for item in sources if not hasattr(item, "read")]
+        pool_type = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_type(max_workers=workers) as pool:
+            pending = iter(pool.map(read_csv_file, paths))
+            tables = [read_csv_file(item) if hasattr(item, "read") else next(pending) for item in sources]
+
+    expected = set(tables[0].column_names)
+    for item, table in zip(sources, tables):
+        if set(table.column_names) != expected:
+            name = item if isinstance(item, str) else getattr(item, "name", "uploaded file")
+            raise ValueError(f"{name} has columns {table.column_names}, expected {tables[0].column_names}.")
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def table_to_frame(table):
+    """Arrow table -> DataFrame; date32 columns stay Arrow-backed (what apply_schema produces)."""
+    import pyarrow as pa
+
+    return table.to_pandas(types_mapper={pa.date32(): pd.ArrowDtype(pa.date32())}.get)
+
+
+def memory_usage(df):
+    """Bytes per column (including string payloads) and in total for one frame."""
+    usage = df.memory_usage(deep=True, index=True)
+    return {
+        "rows": len(df),
+        "columns": {column: int(usage[column]) for column in df.columns},
+        "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+        "total_bytes": int(usage.sum()),
+    }
+
 # -----------------------------------------------------------------------------------
 #  This class loads consumption and outages log csv files. 
 #  It also embed outages log into vector db.
 # -----------------------------------------------------------------------------------
 class DataAgent:
-    def __init__(self, consumption_file=None, outage_file=None):
+    def __init__(self, consumption_file=None, outage_file=None, vector_backend="chroma", index_dtype="float16",
+                 persist_dir=None, embed=True, compact=True, ingest_workers=None, ingest_executor="thread"):
+        """
+        vector_backend: "chroma" (ChromaDB) or "mmap" (compact MmapVectorIndex
+        stored as an index_dtype "float16" or "int8" matrix).
+        persist_dir: where the vector store is written (defaults to
+        "chroma_db" / "outage_index" in the working directory).
+        embed: embed outage reports while loading. Pass False for SQL-only use
+        and call embed_outage_reports() when retrieval is first needed.
+        compact: enforce CONSUMPTION_SCHEMA / OUTAGE_SCHEMA (category regions,
+        date32 dates, 32-bit MW, Arrow strings). With False, frames keep the
+        default pandas dtypes and '%d-%b-%Y' date strings.
+        ingest_workers / ingest_executor: pool size and kind ("thread" or
+        "process") used when a source expands to several files.
+        """
+        self.embed = embed
+        self.compact = compact
+        self.ingest_workers = ingest_workers
+        self.ingest_executor = ingest_executor
+        self.persist_dir = persist_dir
         self.data_dir = "/content/energy_agentic_ai/data"
+        self.vector_backend = vector_backend
+        self.index_dtype = index_dtype
         self.consumption_df = None
         self.outage_df = None
         self.vectorstore = None
@@ -24,57 +316,149 @@ class DataAgent:
     def load_data(self, consumption_file=None, outage_file=None):
         """
         Load data from uploaded files (Streamlit UI) or from default CSV paths.
+        Either argument may also be a path, a glob, a directory of CSV files
+        or a list of these (e.g. one file per balancing authority per month);
+        the files are parsed in parallel by ingest_files().
         """
         try:
             # Load consumption data
             if consumption_file is not None:
-                consumption_file.seek(0)
-                self.consumption_df = pd.read_csv(consumption_file)
-                self.consumption_df['Date'] = self.consumption_df['Date'].apply(normalize_datetime)
-                print("✅ Loaded consumption data from uploaded file.")
+                self.consumption_df = self._ingest(consumption_file, CONSUMPTION_SCHEMA)
+                print(f"✅ Loaded consumption data from {self._describe(consumption_file)}.")
             else:
                 default_consumption_path = os.path.join(self.data_dir, "consumption.csv")
                 if os.path.exists(default_consumption_path):
-                    self.consumption_df = pd.read_csv(default_consumption_path)
-                    self.consumption_df['Date'] = self.consumption_df['Date'].apply(normalize_datetime)
+                    self.consumption_df = self._ingest(default_consumption_path, CONSUMPTION_SCHEMA)
                     print("✅ Loaded consumption data from default path.")
                 else:
                     raise FileNotFoundError("Consumption data file not found.")
             # Load outage data
             if outage_file is not None:
-                outage_file.seek(0)
-                self.outage_df = pd.read_csv(outage_file)
-                self.outage_df['Date'] = self.outage_df['Date'].apply(normalize_datetime)
-                print("✅ Loaded outage data from uploaded file.")
+                self.outage_df = self._ingest(outage_file, OUTAGE_SCHEMA)
+                print(f"✅ Loaded outage data from {self._describe(outage_file)}.")
             else:
                 default_outage_path = os.path.join(self.data_dir, "outages.csv")
                 if os.path.exists(default_outage_path):
-                    self.outage_df = pd.read_csv(default_outage_path)
-                    self.outage_df['Date'] = self.outage_df['Date'].apply(normalize_datetime)
+                    self.outage_df = self._ingest(default_outage_path, OUTAGE_SCHEMA)
                     print("✅ Loaded outage data from default path.")
                 else:
                     raise FileNotFoundError("Outage data file not found.")
-            self.embed_outage_reports()
+            if self.embed:
+                self.embed_outage_reports()
         except Exception as e:
             print(f"❌ Error loading data: {e}")
 
-    def embed_outage_reports(self, persist_dir="chroma_db"):
-        embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    def _ingest(self, source, schema):
+        table = ingest_files(source, workers=self.ingest_workers, executor=self.ingest_executor)
+        return self._prepare(table_to_frame(table), schema)
 
+    @staticmethod
+    def _describe(source):
+        if hasattr(source, "read"):
+            return "uploaded file"
+        count = len(resolve_sources(source))
+        return f"{count} file" + ("" if count == 1 else "s")
+
+    def _prepare(self, df, schema):
+        if self.compact:
+            return apply_schema(df, schema)
+        df['Date'] = df['Date'].apply(normalize_datetime)
+        return df
+
+    def memory_report(self):
+        """
+        Resident size of the loaded frames: bytes per column and per frame.
+        Example:
+          {"consumption": {"rows": 1500, "columns": {"Date": 6000, ...}, "total_bytes": 31704},
+           "outages": {...}, "total_bytes": 236918}
+        """
+        report = {}
+        for name, df in (("consumption", self.consumption_df), ("outages", self.outage_df)):
+            if df is not None:
+                report[name] = memory_usage(df)
+        report["total_bytes"] = sum(frame["total_bytes"] for frame in report.values())
+        return report
+
+    # -------------------------------
+    # Partitioned Parquet layout
+    # -------------------------------
+    def write_partitioned(self, output_dir, row_group_size=122880):
+        """Write the loaded frames with write_partitioned_dataset()."""
+        return write_partitioned_dataset(output_dir, self.consumption_df, self.outage_df, row_group_size)
+
+    def load_partitioned(self, dataset_dir, region=None, start_date=None, end_date=None):
+        """
+        Load frames back from write_partitioned(), reading only the partitions
+        that match the optional region / date range ('%d-%b-%Y' strings).
+        """
+        import duckdb
+
+        con = duckdb.connect()
+        try:
+            for name, schema in (("consumption", CONSUMPTION_SCHEMA), ("outages", OUTAGE_SCHEMA)):
+                pattern = os.path.join(dataset_dir, name, "**", "*.parquet").replace("'", "''")
+                conditions, params = [], []
+                if region and name == "consumption":
+                    conditions.append("Region = ?")
+                    params.append(region)
+                if start_date and end_date:
+                    conditions.append("Date BETWEEN ? AND ?")
+                    params += [datetime.strptime(start_date, "%d-%b-%Y").date(),
+                               datetime.strptime(end_date, "%d-%b-%Y").date()]
+                    month_sql, month_params = month_range_condition(start_date, end_date)
+                    conditions.append(month_sql)
+                    params += month_params
+                where = " WHERE " + " AND ".join(conditions) if conditions else ""
+                df = con.execute(
+                    f"SELECT * EXCLUDE (year, month) FROM read_parquet('{pattern}', hive_partitioning = true)"
+                    f"{where} ORDER BY Date", params
+                ).fetchdf()
+                df = df[[column for column in schema if column in df.columns]
+                        + [column for column in df.columns if column not in schema]]
+                prepared = self._prepare(df, schema)
+                if name == "consumption":
+                    self.consumption_df = prepared
+                else:
+                    self.outage_df = prepared
+        finally:
+            con.close()
+        print(f"✅ Loaded partitioned data from {dataset_dir}.")
+
+    def embed_outage_reports(self, persist_dir=None):
+        from energy_agentic_ai.agents.embeddings import load_embeddings
+
+        persist_dir = persist_dir or self.persist_dir
+        embedding = load_embeddings()
+
+        # Stored text and metadata keep the '%d-%b-%Y' date strings the retrievers filter on
+        dates = [normalize_datetime(d) for d in self.outage_df["Date"]]
         texts = [
             f"Date: {d}, Region: {r}, Report: {t}"
-            for d, r, t in zip(self.outage_df["Date"], self.outage_df["Region"], self.outage_df["Report_Text"])
+            for d, r, t in zip(dates, self.outage_df["Region"], self.outage_df["Report_Text"])
         ]
 
         metadatas = [
             {"Date": str(d), "Region": r}
-            for d, r in zip(self.outage_df["Date"], self.outage_df["Region"])
+            for d, r in zip(dates, self.outage_df["Region"])
         ]
 
+        if self.vector_backend == "mmap":
+            from energy_agentic_ai.agents.vector_index import MmapVectorIndex
+            self.vectorstore = MmapVectorIndex.build(
+                persist_dir or "outage_index",
+                texts=texts,
+                metadatas=metadatas,
+                embedding=embedding,
+                dtype=self.index_dtype
+            )
+            print("✅ Outage reports embedded and stored in memory-mapped index.")
+            return
+
+        from langchain_community.vectorstores import Chroma
         self.vectorstore = Chroma.from_texts(
             texts=texts,
             embedding=embedding,
             metadatas=metadatas,
-            persist_directory=persist_dir
+            persist_directory=persist_dir or "chroma_db"
         )
         print("✅ Outage reports embedded and stored in ChromaDB.")
@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+from energy_agentic_ai.agents.coalescing import normalize_query
+
+# -----------------------------------------------------------------------------------
+#  Embedding helpers for the retrieval path.
+# -----------------------------------------------------------------------------------
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_embeddings(model_name=DEFAULT_EMBEDDING_MODEL, backend=None):
+    """
+    Build the document/query embedding model from arguments or environment:
+      ENERGY_EMBEDDINGS  "huggingface" (default, sentence-transformers) or
+                         "hashing" (HashingEmbeddings: offline, deterministic)
+    The same choice must be used to build and to query an index.
+    """
+    backend = (backend or os.getenv("ENERGY_EMBEDDINGS", "huggingface")).lower()
+    if backend == "hashing":
+        return HashingEmbeddings()
+    if backend == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    raise ValueError(f"Unknown embeddings backend: {backend}")
+
+
+def embed_queries(embedding, texts):
+    """Query vectors for texts: one embed_queries batch call when the model has it, else embed_query per text."""
+    batch = getattr(embedding, "embed_queries", None)
+    if batch is not None:
+        return batch(list(texts))
+    return [embedding.embed_query(text) for text in texts]
+
+
+class HashingEmbeddings:
+    """
+    Dependency-free embeddings for offline runs and benchmarks: word unigrams,
+    bigrams and character trigrams hashed (crc32, stable across processes)
+    into `dim` signed buckets, then L2-normalized. Lexical, not semantic,
+    but identical on every machine.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _features(self, text):
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class CachedQueryEmbeddings:
+    """
+    Wraps an embeddings model (embed_query / embed_documents) with a bounded
+    LRU cache for query vectors keyed on the normalized query text, so
+    recurring questions skip the encoder. Document embedding is passed through.
+    """
+
+    def __init__(self, base, max_size=1024):
+        self.base = base
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def _store(self, key, vector):
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.base.embed_query(key)
+            self._store(key, vector)
+        return vector
+
+    def embed_queries(self, texts):
+        """
+        Batch API: embed many queries, encoding each distinct cache miss once.
+        Misses go through the query path (the base model's embed_queries if it
+        has one, else embed_query), so vectors match embed_query for the same
+        key on query/document-asymmetric models. Returns vectors in input order.
+        """
+        keys = [normalize_query(t) for t in texts]
+        vectors = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            vector = self._lookup(key)
+            if vector is None:
+                missing.append(key)
+            else:
+                vectors[key] = vector
+        if missing:
+            for key, vector in zip(missing, embed_queries(self.base, missing)):
+                self._store(key, vector)
+                vectors[key] = vector
+        return [vectors[key] for key in keys]
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._cache),
+                "max_size": self.max_size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
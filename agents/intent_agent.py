@@ -1,14 +1,98 @@
+import os
 import re
 import sys
 import json
 import difflib
+import functools
 import pandas as pd
 from dateutil import parser
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from energy_agentic_ai.utils import normalize_datetime
 
 sys.path.append('/content')
 
+# Clause separators for compound queries ("peak demand in ERCO; outage summary for PJM")
+COMPOUND_SEPARATORS = re.compile(r"\s*(?:;|\band also\b|\bas well as\b|\bplus\b)\s*", re.IGNORECASE)
+# Demand metrics that can be requested together ("compare peak and average demand")
+DEMAND_METRIC_PATTERNS = [
+    ("peak_demand", re.compile(r"\b(peak|highest|max|maximum)\b")),
+    ("total_demand", re.compile(r"\b(total|sum|aggregate)\b")),
+    ("average_demand", re.compile(r"\b(average|mean|typical)\b")),
+]
+COMPARISON_RE = re.compile(r"\b(and|vs|versus|compare|both)\b|,")
+UNSTRUCTURED_ACTIONS = ("outage_summary", "free_text")
+
+# Date and detail patterns, compiled once for every parse()
+YEAR_ONLY_RE = re.compile(r"(?<![\d/-])(20\d{2})(?![\d/-])")
+DATE_RANGE_RE = re.compile(
+    r"(?:between|from)\s+([A-Za-z0-9,\-/ ]+?)\s+(?:and|to)\s+([A-Za-z0-9,\-/ ]+)", re.IGNORECASE
+)
+SINGLE_DATE_RE = re.compile(
+    r"\bon\s+([0-9]{1,2}-[A-Za-z]{3}-[0-9]{4}|[A-Za-z]{3,9} [0-9]{1,2}, [0-9]{4}|[0-9]{4}-[0-9]{2}-[0-9]{2})",
+    re.IGNORECASE
+)
+YEAR_RE = re.compile(r"\b(20\d{2}|19\d{2})\b")
+TOP_N_RE = re.compile(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:highest|biggest|largest|peak)\b")
+PER_REGION_RE = re.compile(r"\b(by|each|every|all) regions?\b", re.IGNORECASE)
+GRANULARITY_PATTERNS = [
+    ("day", re.compile(r"\b(daily|per day|by day|each day)\b")),
+    ("month", re.compile(r"\b(monthly|per month|by month|each month)\b")),
+    ("season", re.compile(r"\b(seasonal|per season|by season|each season)\b")),
+    ("year", re.compile(r"\b(yearly|annual|annually|per year|by year|each year)\b")),
+]
+# Relative date phrases, checked in this order
+RELATIVE_PHRASES = ("last week", "this week", "last month", "last year", "this year", "this month",
+                    "yesterday", "today")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date_text(text, day):
+    """
+    dateutil parse of one date expression -> '%d-%b-%Y', or None. Missing
+    parts are filled from `day`, so results are cached per calendar day.
+    """
+    try:
+        return parser.parse(text, default=datetime.combine(day, datetime.min.time())).strftime("%d-%b-%Y")
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def relative_date_range(phrase, day):
+    """(start, end) '%d-%b-%Y' strings of a RELATIVE_PHRASES entry as seen on `day`."""
+    if phrase == "last week":
+        start = day - timedelta(days=day.weekday() + 7)
+        end = start + timedelta(days=6)
+    elif phrase == "this week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=6)
+    elif phrase == "last month":
+        end = day.replace(day=1) - timedelta(days=1)
+        start = end.replace(day=1)
+    elif phrase == "last year":
+        start, end = date(day.year - 1, 1, 1), date(day.year - 1, 12, 31)
+    elif phrase == "this year":
+        start, end = day.replace(month=1, day=1), day
+    elif phrase == "this month":
+        start, end = day.replace(day=1), day
+    elif phrase == "yesterday":
+        start = end = day - timedelta(days=1)
+    elif phrase == "today":
+        start = end = day
+    else:
+        raise ValueError(f"Unknown relative date phrase: {phrase}")
+    return start.strftime("%d-%b-%Y"), end.strftime("%d-%b-%Y")
+
+
+def _parse_key(query):
+    """
+    Key parse_many() de-duplicates on: surrounding and repeated whitespace
+    removed. Case is kept, unlike coalescing.normalize_query, since parse()
+    sees the text as written.
+    """
+    return " ".join(str(query).split())
+
+
 # -----------------------------------------------------------------------------------
 #  This class detects intents after parsing natural language queries.
 # -----------------------------------------------------------------------------------
@@ -17,6 +101,9 @@ class IntentAgent:
         self.llm = llm
         self.region_list = region_list or []
         self.region_aliases = self._build_region_aliases()
+        self._region_patterns = [
+            (re.compile(rf"\b{re.escape(alias)}\b"), code) for alias, code in self.region_aliases.items()
+        ]
         self.actions = [
             "peak_demand",
             "all_demands",
@@ -24,6 +111,7 @@ class IntentAgent:
             "average_demand",
             "outage_summary",
             "average_outage_duration",
+            "outage_demand",
             "anomaly_detection",
             "free_text"
         ]
@@ -39,10 +127,11 @@ class IntentAgent:
         Returns (start_date, end_date) as strings in '%d-%b-%Y' format.
         """
         query = query.strip()
+        day = date.today()
 
         # Handle single 4-digit year
         # Match a standalone 4-digit year not part of another date
-        year_matches = re.findall(r"(?<![\d/-])(20\d{2})(?![\d/-])", query)
+        year_matches = YEAR_ONLY_RE.findall(query)
         if len(year_matches) == 1:
             year = int(year_matches[0])
             start = datetime(year, 1, 1)
@@ -50,52 +139,25 @@ class IntentAgent:
             return {"start_date": start.strftime("%d-%b-%Y"), "end_date": end.strftime("%d-%b-%Y")}
 
         # Handle date ranges first
-        range_match = re.search(
-            r"(?:between|from)\s+([A-Za-z0-9,\-/ ]+?)\s+(?:and|to)\s+([A-Za-z0-9,\-/ ]+)",
-            query, re.IGNORECASE
-        )
+        range_match = DATE_RANGE_RE.search(query)
         if range_match:
-            try:
-                start = parser.parse(range_match.group(1)).strftime("%d-%b-%Y")
-                end = parser.parse(range_match.group(2)).strftime("%d-%b-%Y")
+            start = parse_date_text(range_match.group(1), day)
+            end = parse_date_text(range_match.group(2), day)
+            if start and end:
                 return {"start_date": start, "end_date": end}
-            except Exception:
-                pass
 
         # Handle single date with 'on'
-        single_match = re.search(
-            r"\bon\s+([0-9]{1,2}-[A-Za-z]{3}-[0-9]{4}|[A-Za-z]{3,9} [0-9]{1,2}, [0-9]{4}|[0-9]{4}-[0-9]{2}-[0-9]{2})", query, re.IGNORECASE
-        )
+        single_match = SINGLE_DATE_RE.search(query)
         if single_match:
-            try:
-                start = parser.parse(single_match.group(1)).strftime("%d-%b-%Y")
+            start = parse_date_text(single_match.group(1), day)
+            if start:
                 return {"start_date": start, "end_date": start}
-            except Exception:
-                pass
 
-        today = datetime.today()
-        if "last week" in query:
-            start = today - timedelta(days=today.weekday() + 7)
-            end = start + timedelta(days=6)
-            return {"start_date": start.strftime("%d-%b-%Y"), "end_date": end.strftime("%d-%b-%Y")}
-        if "this week" in query:
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-            return {"start_date": start.strftime("%d-%b-%Y"), "end_date": end.strftime("%d-%b-%Y")}
-        if "last month" in query:
-            first_this_month = today.replace(day=1)
-            last_month_end = first_this_month - timedelta(days=1)
-            last_month_start = last_month_end.replace(day=1)
-            return {"start_date": last_month_start.strftime("%d-%b-%Y"), "end_date": last_month_end.strftime("%d-%b-%Y")}
-        if "this month" in query:
-            start = today.replace(day=1)
-            end = today
-            return {"start_date": start.strftime("%d-%b-%Y"), "end_date": end.strftime("%d-%b-%Y")}
-        if "yesterday" in query:
-            y = today - timedelta(days=1)
-            return {"start_date": y.strftime("%d-%b-%Y"), "end_date": y.strftime("%d-%b-%Y")}
-        if "today" in query:
-            return {"start_date": today.strftime("%d-%b-%Y"), "end_date": today.strftime("%d-%b-%Y")}
+        # Relative phrases, resolved once per calendar day
+        for phrase in RELATIVE_PHRASES:
+            if phrase in query:
+                start, end = relative_date_range(phrase, day)
+                return {"start_date": start, "end_date": end}
         return {"start_date": None, "end_date": None}
 
     def _build_region_aliases(self):
@@ -109,25 +171,54 @@ class IntentAgent:
 
     def detect_region(self, query: str):
         q = query.lower()
-        for alias, code in self.region_aliases.items():
-            if re.search(rf"\b{re.escape(alias)}\b", q):
+        for pattern, code in self._region_patterns:
+            if pattern.search(q):
                 return code
         return None
 
+    def detect_regions(self, query: str):
+        """All regions named in the query, in order of appearance."""
+        q = query.lower()
+        found = []
+        for pattern, code in self._region_patterns:
+            match = pattern.search(q)
+            if match:
+                found.append((match.start(), code))
+        return list(dict.fromkeys(code for _, code in sorted(found)))
+
+    def detect_granularity(self, query: str):
+        q = query.lower()
+        for granularity, pattern in GRANULARITY_PATTERNS:
+            if pattern.search(q):
+                return granularity
+        return None
+
+    def detect_top_n(self, query: str):
+        """'top 5 peak days', '3 highest demand days' -> 5, 3; None when no count is asked for."""
+        match = TOP_N_RE.search(query.lower())
+        if match:
+            return int(match.group(1) or match.group(2))
+        return None
+
     def detect_year(self, query: str):
-        match = re.search(r"\b(20\d{2}|19\d{2})\b", query)
+        match = YEAR_RE.search(query)
         if match:
             return int(match.group(0))
         return None
 
     def _rule_based_intent(self, query: str) -> dict:
         q = query.lower()
-        region = self.detect_region(query)
+        regions = self.detect_regions(query)
+        region = regions[0] if regions else None
         year = self.detect_year(query)
         time_window = self.extract_date_from_query(query)
 
+        # --- Outage vs demand comparison ---
+        if any(k in q for k in ["outage", "blackout"]) and "demand" in q:
+            action = "outage_demand"
+
         # --- Demand actions ---
-        if any(k in q for k in ["peak", "highest", "max demand", "top load"]):
+        elif any(k in q for k in ["peak", "highest", "max demand", "top load"]):
             action = "peak_demand"
         elif any(k in q for k in ["total demand", "sum of demand", "aggregate demand", "overall demand"]):
             action = "total_demand"
@@ -155,6 +246,9 @@ class IntentAgent:
         return {
             "action": action,
             "region": region,
+            "regions": regions,
+            "granularity": self.detect_granularity(query),
+            "top_n": self.detect_top_n(query),
             "year": year,
             "start_date": time_window["start_date"],
             "end_date": time_window["end_date"],
@@ -195,5 +289,125 @@ class IntentAgent:
         if rule_result:
             return rule_result
         llm_result = self._llm_intent(query)
-        return llm_result    
+        return llm_result
+
+    def parse_many(self, queries, processes=None, chunksize=256):
+        """
+        Parse a batch of queries (e.g. an archived query log). Equivalent to
+        [self.parse(_parse_key(q)) for q in queries], but every distinct
+        normalized query is parsed once and large batches are split across a
+        pool of `processes` worker processes (default: one per CPU; 1 parses
+        in this process). Workers rebuild the rule-based agent from
+        region_list; with an LLM configured, batches stay in this process.
+        Returns one intent dict per input query, in input order.
+        """
+        keys = [_parse_key(query) for query in queries]
+        distinct = list(dict.fromkeys(keys))
+        processes = processes or os.cpu_count() or 1
+        if self.llm is not None or processes == 1 or len(distinct) <= chunksize:
+            parsed = [self.parse(query) for query in distinct]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            chunks = [distinct[i:i + chunksize] for i in range(0, len(distinct), chunksize)]
+            with ProcessPoolExecutor(max_workers=min(processes, len(chunks)), initializer=_init_worker,
+                                     initargs=(self.region_list,)) as pool:
+                parsed = [intent for chunk in pool.map(_parse_chunk, chunks) for intent in chunk]
+        by_key = dict(zip(distinct, parsed))
+        # Duplicates get their own copy (lists included), so callers can edit one intent safely
+        return [{k: list(v) if isinstance(v, list) else v for k, v in by_key[key].items()} for key in keys]
+
+    # -------------------------------
+    # Compound queries
+    # -------------------------------
+    def parse_compound(self, query: str) -> list:
+        """
+        Splits a compound or comparative query into independent sub-intents.
+        - Clauses joined by ';', 'and also', 'as well as' or 'plus' are parsed
+          separately; a clause without its own regions or dates inherits them
+          from the whole query (unless it asks "by region"). A clause with no
+          action of its own ("... plus PJM", "... and also the average")
+          continues the previous one instead of becoming a free-text question.
+        - Several demand metrics in one clause ("peak and average demand")
+          become one sub-intent per metric.
+        - Retrieval questions naming several regions become one sub-intent per
+          region; each retrieves with its own region filter (applied in the
+          vector store before top-k), so every section has that region's reports.
+        Every sub-intent carries its own "query" text. A simple query returns a
+        single intent.
+        """
+        whole = self.parse(query)
+        if not query or not query.strip():
+            return [whole]
+
+        clauses = [c for c in COMPOUND_SEPARATORS.split(query.strip()) if c.strip()]
+        if len(clauses) <= 1:
+            return self._expand(query, whole)
+
+        intents = []
+        previous = None
+        for clause in clauses:
+            intent = self.parse(clause)
+            if intent.get("action") == "free_text" and previous is not None:
+                # A fragment ("... plus PJM", "... and also the average") continues the previous clause
+                self._continue_clause(clause, intent, previous)
+                if intent["action"] in UNSTRUCTURED_ACTIONS:
+                    # Retrieval searches with the whole question; the region/date filters differ
+                    clause = query
+            previous = intent
+            per_region = PER_REGION_RE.search(clause)
+            if not intent.get("regions") and not per_region:
+                intent["region"], intent["regions"] = whole.get("region"), whole.get("regions", [])
+            if not intent.get("start_date") and not intent.get("year"):
+                intent["year"] = whole.get("year")
+                intent["start_date"], intent["end_date"] = whole.get("start_date"), whole.get("end_date")
+            intents.extend(self._expand(clause, intent))
+
+        unique = {}
+        for intent in intents:
+            key = json.dumps({k: v for k, v in intent.items() if k != "query"}, sort_keys=True, default=str)
+            unique.setdefault(key, intent)
+        return list(unique.values())
+
+    @staticmethod
+    def _continue_clause(clause, intent, previous):
+        """
+        Gives a clause without an action of its own the previous clause's
+        action (or the demand metric it names) and the details it leaves out.
+        """
+        action = previous.get("action")
+        if action in dict(DEMAND_METRIC_PATTERNS):
+            metrics = [name for name, pattern in DEMAND_METRIC_PATTERNS if pattern.search(clause.lower())]
+            action = metrics[0] if metrics else action
+        intent["action"] = action
+        for key in ("granularity", "top_n"):
+            if intent.get(key) is None:
+                intent[key] = previous.get(key)
+
+    def _expand(self, clause, intent):
+        q = clause.lower()
+        action = intent.get("action")
+
+        if action in dict(DEMAND_METRIC_PATTERNS) and COMPARISON_RE.search(q):
+            metrics = [name for name, pattern in DEMAND_METRIC_PATTERNS if pattern.search(q)]
+            if len(metrics) > 1:
+                return [dict(intent, action=metric, query=clause) for metric in metrics]
+
+        # Retrieval takes a single region filter (UnstructuredReportAgent.retrieve_documents)
+        if action in UNSTRUCTURED_ACTIONS and len(intent.get("regions") or []) > 1:
+            return [dict(intent, region=region, regions=[region], query=clause) for region in intent["regions"]]
+
+        return [dict(intent, query=clause)]
+
+
+# Per-process IntentAgent of the parse_many() worker pool
+_worker_agent = None
+
+
+def _init_worker(region_list):
+    global _worker_agent
+    _worker_agent = IntentAgent(region_list=region_list)
+
 
+def _parse_chunk(queries):
+    return [_worker_agent.parse(query) for query in queries]
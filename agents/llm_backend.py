@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+# -----------------------------------------------------------------------------------
+#  Pluggable LLM backends used by the report agents.
+#  Backends are cheap to construct: no client or HTTP connection is created
+#  until the first chat() call. All OpenAI-compatible backends share one
+#  pooled, keep-alive HTTP session per process.
+# -----------------------------------------------------------------------------------
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_POOL_SIZE = 32
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session(pool_size=DEFAULT_POOL_SIZE):
+    """
+    Return the process-wide requests.Session, creating it on first use.
+    The session keeps connections alive and pools up to `pool_size`
+    connections per host, so concurrent report agents reuse sockets.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+class LLMBackend:
+    """Base class: subclasses implement chat() and return the reply text."""
+
+    def chat(self, messages, max_tokens=60, temperature=0.0):
+        raise NotImplementedError
+
+
+class HuggingFaceBackend(LLMBackend):
+    """
+    Hosted Hugging Face Inference API backend.
+    The InferenceClient is built lazily, so a missing token only fails
+    when a request is actually made.
+    """
+
+    def __init__(self, model_id, token=None, timeout=DEFAULT_TIMEOUT):
+        self.model_id = model_id
+        self.token = token
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    hf_token = self.token or os.getenv("HUGGINGFACEHUB_API_TOKEN")
+                    if not hf_token:
+                        raise ValueError("❌ Missing Hugging Face API token. Set HUGGINGFACEHUB_API_TOKEN in environment.")
+                    from huggingface_hub import InferenceClient
+                    self._client = InferenceClient(model=self.model_id, token=hf_token, timeout=self.timeout)
+        return self._client
+
+    def chat(self, messages, max_tokens=60, temperature=0.0):
+        response = self.client.chat.completions.create(
+            model=self.model_id,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if not response.choices or not response.choices[0].message:
+            return ""
+        return response.choices[0].message["content"] or ""
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Backend for any server exposing POST {base_url}/chat/completions,
+    e.g. the local stand-in in stub_llm_server.py, vLLM or llama.cpp.
+    """
+
+    def __init__(self, base_url, model_id, api_key=None, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.model_id = model_id
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def chat(self, messages, max_tokens=60, temperature=0.0):
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        response = get_http_session().post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": self.model_id,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            },
+            headers=headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        choices = response.json().get("choices") or []
+        if not choices or not choices[0].get("message"):
+            return ""
+        return choices[0]["message"].get("content") or ""
+
+
+class StubBackend(LLMBackend):
+    """
+    In-process stand-in for offline runs and benchmarks: sleeps `latency`
+    seconds and answers with the first evidence line of the prompt, so the
+    reply is deterministic and reflects what was retrieved.
+    """
+
+    def __init__(self, model_id="stub", latency=0.0):
+        self.model_id = model_id
+        self.latency = latency
+
+    def chat(self, messages, max_tokens=60, temperature=0.0):
+        if self.latency:
+            time.sleep(self.latency)
+        lines = [line.strip() for line in messages[-1]["content"].splitlines() if line.strip()]
+        evidence = lines[2] if len(lines) > 2 else (lines[-1] if lines else "")
+        return " ".join(evidence.split()[:max_tokens])
+
+
+def get_backend(model_id, backend=None, base_url=None, timeout=None):
+    """
+    Build a backend from arguments or environment:
+      ENERGY_LLM_BACKEND   "huggingface" (default), "openai" or "stub"
+      ENERGY_LLM_BASE_URL  base URL for the OpenAI-compatible backend
+                           (default http://127.0.0.1:8808/v1)
+      ENERGY_LLM_TIMEOUT   request timeout in seconds
+    """
+    backend = (backend or os.getenv("ENERGY_LLM_BACKEND", "huggingface")).lower()
+    timeout = float(timeout or os.getenv("ENERGY_LLM_TIMEOUT", DEFAULT_TIMEOUT))
+    if backend in ("openai", "local"):
+        base_url = base_url or os.getenv("ENERGY_LLM_BASE_URL", "http://127.0.0.1:8808/v1")
+        return OpenAICompatibleBackend(base_url, model_id, api_key=os.getenv("ENERGY_LLM_API_KEY"), timeout=timeout)
+    if backend == "huggingface":
+        return HuggingFaceBackend(model_id, timeout=timeout)
+    if backend == "stub":
+        return StubBackend(model_id)
+    raise ValueError(f"Unknown LLM backend: {backend}")
@@ -0,0 +1,288 @@
+import os
+import threading
+from urllib.parse import unquote
+from datetime import date, datetime
+
+# -----------------------------------------------------------------------------------
+#  Compiles a parsed IntentAgent result into one parameterized DuckDB query.
+#  SQL text depends only on the query *shape* (action, number of regions,
+#  whether a date range is present, grouping granularity), so plans are
+#  cached per shape and the values are bound as parameters.
+#
+#  Snapshot tables carry a precomputed `Day DATE` column and are sorted by
+#  (Region, Day), so Region/Day filters are plain column predicates that
+#  DuckDB evaluates during the scan, before any derived column is computed.
+#  When consumption is read from a Hive-partitioned Parquet dataset
+#  (Region=/year=/month=), partitions are pruned here, at planning time:
+#  only the files whose region and month match are bound as a parameter of
+#  read_parquet(), so DuckDB neither globs nor filters the whole archive.
+# -----------------------------------------------------------------------------------
+
+DEMAND_METRICS = {
+    "all_demands": None,
+    "peak_demand": ("MAX(Demand_MW)", "PeakDemand"),
+    "total_demand": ("SUM(Demand_MW)", "TotalDemand"),
+    "average_demand": ("AVG(Demand_MW)", "AverageDemand"),
+}
+OUTAGE_METRICS = {
+    "structured_outage_summary": [("COUNT(*)", "TotalOutages"), ("SUM(Duration_hr)", "TotalHours")],
+    "average_outage_duration": [("AVG(Duration_hr)", "AverageOutageDuration")],
+}
+# Meteorological seasons: December counts toward the next year's winter
+# ("Winter 2024" = Dec 2023 - Feb 2024), hence the one-month shift.
+SEASON_DAY = "(Day + INTERVAL 1 MONTH)"
+PERIODS = {
+    "day": "strftime(Day, '%d-%b-%Y')",
+    "month": "strftime(Day, '%Y-%m')",
+    "season": (f"(['Winter', 'Spring', 'Summer', 'Autumn'])[quarter({SEASON_DAY})] "
+               f"|| ' ' || CAST(year({SEASON_DAY}) AS VARCHAR)"),
+    "year": "CAST(year(Day) AS VARCHAR)",
+}
+PERIOD_ORDER = {
+    "day": "Day",
+    "month": "date_trunc('month', Day)",
+    "season": f"date_trunc('quarter', {SEASON_DAY})",
+    "year": "year(Day)",
+}
+# Top-N peak days per region (and per period): ranked by the day's peak,
+# ties resolve to the earlier day, so results are deterministic.
+TOP_PEAKS = "top_peaks"
+MONTH_RANGE_SQL = "(year > ? OR (year = ? AND month >= ?)) AND (year < ? OR (year = ? AND month <= ?))"
+PARTITIONED_SOURCE = "(SELECT *, Date AS Day FROM read_parquet(?, hive_partitioning = true))"
+
+
+def _parse_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%d-%b-%Y").date()
+
+
+def month_range_condition(start_day, end_day):
+    """
+    Predicate on the `year` / `month` partition columns covering start..end,
+    for one-off reads through a glob. Written as plain comparisons (not
+    year * 100 + month) so DuckDB can evaluate it against partition paths.
+    """
+    start_day, end_day = _parse_day(start_day), _parse_day(end_day)
+    sql = MONTH_RANGE_SQL
+    params = [start_day.year, start_day.year, start_day.month, end_day.year, end_day.year, end_day.month]
+    return sql, params
+
+
+class PartitionIndex:
+    """Files of a Region=/year=/month= Parquet dataset, listed once per snapshot."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        for root, _, files in os.walk(path):
+            keys = dict(
+                unquote(part).split("=", 1)
+                for part in os.path.relpath(root, path).split(os.sep) if "=" in part
+            )
+            month = int(keys["year"]) * 12 + int(keys["month"]) - 1 if "year" in keys and "month" in keys else None
+            for name in sorted(files):
+                if name.endswith(".parquet"):
+                    self.entries.append((keys.get("Region"), month, os.path.join(root, name)))
+
+    def select(self, regions=None, date_range=None):
+        """Files that can hold rows for the given regions and (start, end) dates."""
+        first = last = None
+        if date_range:
+            first = date_range[0].year * 12 + date_range[0].month - 1
+            last = date_range[1].year * 12 + date_range[1].month - 1
+        wanted = set(regions or [])
+        return [
+            path for region, month, path in self.entries
+            if (not wanted or region is None or region in wanted)
+            and (first is None or month is None or first <= month <= last)
+        ]
+
+
+class CompiledQuery:
+    def __init__(self, action, shape, sql, params, columns, empty=False):
+        self.action = action
+        self.shape = shape
+        self.sql = sql
+        self.params = params
+        self.columns = columns
+        # True when partition pruning left no file to read
+        self.empty = empty
+
+    @property
+    def key(self):
+        """Hashable identity of the query (shape + bound values), used for coalescing."""
+        return (self.shape, tuple(tuple(p) if isinstance(p, list) else p for p in self.params))
+
+
+class QueryCompiler:
+    SUPPORTED_ACTIONS = set(DEMAND_METRICS) | set(OUTAGE_METRICS) | {TOP_PEAKS}
+
+    def __init__(self, partitions=None):
+        """partitions: {view name: PartitionIndex} for views backed by a partitioned dataset."""
+        self.partitions = dict(partitions or {})
+        self._plans = {}
+        self._lock = threading.Lock()
+        self.stats = {"plan_hits": 0, "plan_misses": 0}
+
+    # -------------------------------
+    # Intent normalization
+    # -------------------------------
+    @staticmethod
+    def regions_of(intent):
+        regions = intent.get("regions") or ([intent["region"]] if intent.get("region") else [])
+        return list(dict.fromkeys(regions))
+
+    @staticmethod
+    def date_range_of(intent):
+        """Explicit start/end dates win; otherwise a `year` becomes a Jan 1 - Dec 31 range."""
+        if intent.get("start_date") and intent.get("end_date"):
+            return _parse_day(intent["start_date"]), _parse_day(intent["end_date"])
+        if intent.get("year"):
+            year = int(intent["year"])
+            return date(year, 1, 1), date(year, 12, 31)
+        return None
+
+    # -------------------------------
+    # Compilation
+    # -------------------------------
+    def compile(self, intent):
+        action = intent.get("action")
+        if action not in self.SUPPORTED_ACTIONS:
+            raise ValueError(f"Action '{action}' cannot be compiled to SQL.")
+        granularity = intent.get("granularity")
+        if granularity is not None and granularity not in PERIODS:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        regions = self.regions_of(intent)
+        date_range = self.date_range_of(intent)
+        source = "df_outages_var" if action in OUTAGE_METRICS else "df_consumption_var"
+        partitions = self.partitions.get(source)
+        prune = partitions is not None and bool(regions or date_range)
+        shape = (action, len(regions), date_range is not None, granularity, prune)
+
+        with self._lock:
+            plan = self._plans.get(shape)
+            if plan is None:
+                self.stats["plan_misses"] += 1
+                plan = self._plans[shape] = self._build(*shape)
+            else:
+                self.stats["plan_hits"] += 1
+
+        sql, columns = plan
+        params = list(regions) + (list(date_range) if date_range else [])
+        if action == TOP_PEAKS:
+            top_n = int(intent.get("top_n") or 1)
+            if top_n < 1:
+                raise ValueError(f"top_n must be at least 1, got {top_n}")
+            params.append(top_n)
+        if prune:
+            files = partitions.select(regions, date_range)
+            return CompiledQuery(action, shape, sql, [files] + params, columns, empty=not files)
+        return CompiledQuery(action, shape, sql, params, columns)
+
+    def set_partitions(self, partitions):
+        """Switch sources (e.g. after a reload from Parquet); cached plans are dropped."""
+        with self._lock:
+            self.partitions = dict(partitions or {})
+            self._plans = {}
+
+    @staticmethod
+    def _where(n_regions, has_range):
+        conditions = []
+        if n_regions == 1:
+            conditions.append("Region = ?")
+        elif n_regions > 1:
+            conditions.append(f"Region IN ({', '.join('?' * n_regions)})")
+        if has_range:
+            conditions.append("Day BETWEEN ? AND ?")
+        return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    def _build(self, action, n_regions, has_range, granularity, prune):
+        if action == TOP_PEAKS:
+            return self._build_top_peaks(n_regions, has_range, granularity, prune)
+        if action in DEMAND_METRICS:
+            return self._build_demand(action, n_regions, has_range, granularity, prune)
+        return self._build_outage(action, n_regions, has_range, granularity, prune)
+
+    def _build_demand(self, action, n_regions, has_range, granularity, prune=False):
+        where = self._where(n_regions, has_range)
+        source = PARTITIONED_SOURCE if prune else "df_consumption_var"
+
+        if action == "all_demands":
+            sql = (f"SELECT strftime(Day, '%d-%b-%Y') AS Date, Region, Demand_MW AS Demand "
+                   f"FROM {source}{where} ORDER BY Day ASC, Region")
+            return sql, ["Date", "Region", "Demand"]
+
+        expression, alias = DEMAND_METRICS[action]
+
+        if action == "peak_demand" and n_regions <= 1 and granularity is None:
+            # Single overall peak row (legacy get_peak_demand shape)
+            sql = (f"SELECT strftime(Day, '%d-%b-%Y') AS Date, Region, Demand_MW AS {alias} "
+                   f"FROM {source}{where} ORDER BY Demand_MW DESC, Day ASC, Region LIMIT 1")
+            return sql, ["Date", "Region", alias]
+
+        select = ["Region"]
+        group = ["Region"]
+        order = ["Region"]
+        if granularity:
+            select.append(f"{PERIODS[granularity]} AS Period")
+            group.append("Period")
+            order.append(f"min({PERIOD_ORDER[granularity]})")
+        if action == "peak_demand":
+            # Day of the peak within each group; ties resolve to the earliest day
+            select.append("strftime(arg_max(Day, (Demand_MW, -epoch(Day))), '%d-%b-%Y') AS Date")
+        select.append(f"{expression} AS {alias}")
+
+        sql = (f"SELECT {', '.join(select)} FROM {source}{where} "
+               f"GROUP BY {', '.join(group)} ORDER BY {', '.join(order)}")
+        columns = ["Region"] + (["Period"] if granularity else []) + (["Date"] if action == "peak_demand" else []) + [alias]
+        return sql, columns
+
+    def _build_top_peaks(self, n_regions, has_range, granularity, prune=False):
+        """
+        One windowed pass: rows are reduced to each region's peak per day
+        (several readings per day collapse to their maximum), ranked with
+        ROW_NUMBER per region / period and cut by QUALIFY, so no per-row
+        subquery is evaluated and the cost grows with the rows scanned.
+        """
+        where = self._where(n_regions, has_range)
+        source = PARTITIONED_SOURCE if prune else "df_consumption_var"
+        partition = ["Region"]
+        select = ["Region"]
+        order = ["Region"]
+        if granularity:
+            select.append(f"{PERIODS[granularity]} AS Period")
+            partition.append(PERIOD_ORDER[granularity])
+            order.append(PERIOD_ORDER[granularity])
+        select += [
+            "strftime(Day, '%d-%b-%Y') AS Date",
+            "MAX(Demand_MW) AS PeakDemand",
+            f"ROW_NUMBER() OVER (PARTITION BY {', '.join(partition)} ORDER BY MAX(Demand_MW) DESC, Day ASC) AS Rank",
+        ]
+        sql = (f"SELECT {', '.join(select)} FROM {source}{where} "
+               f"GROUP BY Region, Day QUALIFY Rank <= ? ORDER BY {', '.join(order)}, Rank")
+        columns = ["Region"] + (["Period"] if granularity else []) + ["Date", "PeakDemand", "Rank"]
+        return sql, columns
+
+    def _build_outage(self, action, n_regions, has_range, granularity, prune=False):
+        where = self._where(n_regions, has_range)
+        source = PARTITIONED_SOURCE if prune else "df_outages_var"
+        select = ["Region"]
+        group = ["Region"]
+        order = ["Region"]
+        if granularity:
+            select.append(f"{PERIODS[granularity]} AS Period")
+            group.append("Period")
+            order.append(f"min({PERIOD_ORDER[granularity]})")
+        select += [f"{expression} AS {alias}" for expression, alias in OUTAGE_METRICS[action]]
+        sql = (f"SELECT {', '.join(select)} FROM {source}{where} "
+               f"GROUP BY {', '.join(group)} ORDER BY {', '.join(order)}")
+        columns = ["Region"] + (["Period"] if granularity else []) + [alias for _, alias in OUTAGE_METRICS[action]]
+        return sql, columns
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, cached_plans=len(self._plans))
@@ -1,7 +1,5 @@
-import os
 import sys
 import pandas as pd
-from huggingface_hub import InferenceClient
 from datetime import datetime
 from energy_agentic_ai.utils import normalize_datetime
 
@@ -12,11 +10,8 @@ sys.path.append('/content')
 # -----------------------------------------------------------------------------------
 class StructuredReportAgent:
     def __init__(self, model_name="mistralai/Mixtral-8x7B-Instruct-v0.1"):
+        # Reports are template-based; no LLM client is built
         self.model_name = model_name
-        self.client = InferenceClient(
-            model=model_name,
-            token=os.environ["HUGGINGFACEHUB_API_TOKEN"]
-        )
 
     # -------------------------------
     # Generate demand report
@@ -70,8 +65,11 @@ class StructuredReportAgent:
             else:
                 date_str = "N/A"
 
+            period = r.get("Period")
             if date_str != "N/A":
                 sentences.append(f"{label} observed on {date_str} in {region} with {value} MW.")
+            elif period:
+                sentences.append(f"{label} in {region} for {period} was {value} MW.")
             else:
                 sentences.append(f"{label} in {region} was {value} MW.")
 
@@ -119,6 +117,8 @@ class StructuredReportAgent:
             # Region-wise totals
             for r in records:
                 region = r.get("Region", "Unknown")
+                if r.get("Period"):
+                    region = f"{region} {r['Period']}"
                 outages = int(r.get("TotalOutages", 0))
                 hours = r.get("TotalHours", 0)
                 hours_display = int(hours) if float(hours).is_integer() else round(hours, 1)
@@ -130,6 +130,8 @@ class StructuredReportAgent:
             # Region-wise averages
             for r in records:
                 region = r.get("Region", "Unknown")
+                if r.get("Period"):
+                    region = f"{region} {r['Period']}"
                 avg_dur = r.get("AverageOutageDuration", 0)
                 dur_display = int(avg_dur) if float(avg_dur).is_integer() else round(avg_dur, 1)
                 hour_word = "hr" if dur_display == 1 else "hrs"
@@ -150,3 +152,37 @@ class StructuredReportAgent:
 
         return " ".join(summary_parts)
 
+    # -------------------------------
+    # Generate outage vs demand report
+    # -------------------------------
+    def generate_outage_demand_report(self, analysis_result, query):
+        """
+        Compare demand on outage days with normal days, per region.
+        Example output:
+          "CISO: avg demand 573481 MW on 42 outage days vs 559285 MW on 208 normal days (+2.5%); peak 823037 vs 876944 MW."
+        """
+        if analysis_result is None or len(analysis_result) == 0:
+            return "No outage records found!"
+
+        records = analysis_result.to_dict(orient="records") if isinstance(analysis_result, pd.DataFrame) else analysis_result
+
+        sentences = []
+        for r in records:
+            region = r.get("Region", "Unknown")
+            outage_days = int(r.get("OutageDays") or 0)
+            normal_days = int(r.get("NormalDays") or 0)
+            if outage_days == 0:
+                sentences.append(f"{region}: no outage days recorded.")
+                continue
+            change = r.get("AvgDemandChangePct")
+            change_str = f" ({change:+.1f}%)" if change is not None and not pd.isna(change) else ""
+            normal_avg = r.get("AvgDemandNormalDays")
+            normal_avg_str = f"{normal_avg:.0f}" if normal_avg is not None and not pd.isna(normal_avg) else "N/A"
+            normal_peak = r.get("PeakDemandNormalDays")
+            normal_peak_str = f"{normal_peak:.0f}" if normal_peak is not None and not pd.isna(normal_peak) else "N/A"
+            sentences.append(
+                f"{region}: avg demand {r['AvgDemandOutageDays']:.0f} MW on {outage_days} outage days "
+                f"vs {normal_avg_str} MW on {normal_days} normal days{change_str}; "
+                f"peak {r['PeakDemandOutageDays']:.0f} vs {normal_peak_str} MW."
+            )
+        return "\n".join(sentences)
@@ -1,107 +1,184 @@
-import os
 import re
+import time
+import threading
 from datetime import datetime
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from huggingface_hub import InferenceClient
+from energy_agentic_ai.agents.llm_backend import get_backend
+from energy_agentic_ai.agents.coalescing import SingleFlight, normalize_query
+from energy_agentic_ai.agents.context_packer import ContextPacker
+from energy_agentic_ai.agents.embeddings import CachedQueryEmbeddings, load_embeddings
+from energy_agentic_ai.slow_log import current_trace
 
 # -----------------------------------------------------------------------------------
 #  This class generates reports for unstructured analyses date.
 # -----------------------------------------------------------------------------------
 class UnstructuredReportAgent:
 
-    def __init__(self, chroma_path="/content/chroma_db", model_id="HuggingFaceH4/zephyr-7b-beta", top_k=10):
+    def __init__(self, chroma_path="/content/chroma_db", model_id="HuggingFaceH4/zephyr-7b-beta", top_k=10, backend=None, context_token_budget=400,
+                 vector_backend="chroma", index_path="/content/outage_index", query_cache_size=1024):
         """
         Initialize the agent with:
-        - Local ChromaDB store for embedded outage reports
-        - Hugging Face Zephyr model for summarization
+        - Local ChromaDB store (vector_backend="chroma") or a memory-mapped
+          MmapVectorIndex at index_path (vector_backend="mmap") for embedded outage reports
+        - An LLM backend for summarization (Zephyr on the hosted API by default,
+          see llm_backend.get_backend for the local OpenAI-compatible option)
+        - A context packer that fits retrieved reports into context_token_budget
+        - An LRU cache of query embeddings (query_cache_size entries)
+        The embedding model and vector store are opened on first retrieval.
         """
+        if vector_backend not in ("chroma", "mmap"):
+            raise ValueError(f"Unknown vector backend: {vector_backend}")
         self.chroma_path = chroma_path
+        self.index_path = index_path
         self.model_id = model_id
         self.top_k = top_k
+        self.vector_backend = vector_backend
+        self.query_cache_size = query_cache_size
+        self.embedding = None
+        self.db = None
+        self._retriever = None
+        self._store_lock = threading.Lock()
+
+        # LLM backend; the underlying client is built lazily on first request
+        self.backend = backend or get_backend(self.model_id)
+        self._flight = SingleFlight()
+        self.packer = ContextPacker(token_budget=context_token_budget)
+
+    @property
+    def retriever(self):
+        if self._retriever is None:
+            with self._store_lock:
+                if self._retriever is None:
+                    self._open_store()
+        return self._retriever
+
+    def _open_store(self):
+        """Load the embedding model and vector store (heavy imports happen here)."""
+        # Query vectors are cached by normalized text
+        embedding_model = CachedQueryEmbeddings(
+            load_embeddings(),
+            max_size=self.query_cache_size
+        )
+        if self.vector_backend == "mmap":
+            from energy_agentic_ai.agents.vector_index import MmapVectorIndex
+            self.db = MmapVectorIndex(self.index_path, embedding=embedding_model)
+        else:
+            from langchain_chroma import Chroma
+            self.db = Chroma(persist_directory=self.chroma_path, embedding_function=embedding_model)
+        self.embedding = embedding_model
+        self._retriever = self.db.as_retriever(search_kwargs={"k": self.top_k})
 
-        # Initialize ChromaDB embeddings & vectorstore
-        embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        self.db = Chroma(persist_directory=self.chroma_path, embedding_function=embedding_model)
-        docs = self.db.get()
+    def query_outage_reports(self, query: str, region=None, start_date=None, end_date=None) -> str:
+        """
+        Retrieve relevant outage reports (restricted to `region` when given) and summarize concisely using Zephyr.
+        Ensures minimal, factual output. Identical concurrent questions (same
+        normalized text, region and dates) share one retrieval and LLM call.
+        """
+        key = (normalize_query(query), region, start_date, end_date)
+        return self._flight.do(key, self._query_outage_reports, query, region, start_date, end_date)
 
-        self.retriever = self.db.as_retriever(search_kwargs={"k": self.top_k})
+    def get_coalescing_stats(self):
+        """How many identical concurrent questions were served by a single LLM call."""
+        return self._flight.get_stats()
 
-        # Initialize Hugging Face Inference API client
-        hf_token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-        if not hf_token:
-            raise ValueError("❌ Missing Hugging Face API token. Set HUGGINGFACEHUB_API_TOKEN in environment.")
-        self.client = InferenceClient(model=self.model_id, token=hf_token)
+    def get_query_cache_stats(self):
+        """Hit rate and size of the query-embedding cache (empty until the store is opened)."""
+        return self.embedding.get_stats() if self.embedding is not None else {}
 
-    def query_outage_reports(self, query: str, region=None, start_date=None, end_date=None) -> str:
+    def warm_query_cache(self, queries):
+        """Batch-encode recurring (e.g. dashboard) questions into the query-embedding cache."""
+        self.retriever  # opens the store and the embedding cache
+        self.embedding.embed_queries(queries)
+
+    def retrieve_documents(self, query, region=None, start_date=None, end_date=None):
         """
-        Retrieve relevant outage reports from ChromaDB and summarize concisely using Zephyr.
-        Ensures minimal, factual output.
+        Retrieval stage: vector search, de-duplication and the date filter.
+        Dates are '%d-%b-%Y' strings (validated by the caller). The region is
+        filtered inside the vector store, before top-k selection.
         """
+        filters = {}
+        if self.vector_backend == "mmap":
+            # Region and date masks are applied inside the index, before top-k selection
+            if region:
+                filters["region"] = region
+            if start_date and end_date:
+                filters.update(start_date=start_date, end_date=end_date)
+        elif region:
+            filters["filter"] = {"Region": region}
+        docs = self.retriever.invoke(query, **filters)
+
+        # Deduplicate by metadata + content
+        unique_docs = {}
+        for doc in docs:
+            key = (doc.metadata.get("Date"), doc.metadata.get("Region"), doc.page_content)
+            unique_docs[key] = doc
+        docs = list(unique_docs.values())
+
+        # Apply date filtering if provided
+        if start_date and end_date:
+            start_dt = datetime.strptime(start_date, "%d-%b-%Y")
+            end_dt = datetime.strptime(end_date, "%d-%b-%Y")
+            return [
+                doc for doc in docs
+                if "Date" in doc.metadata and
+                start_dt <= datetime.strptime(doc.metadata["Date"], "%d-%b-%Y") <= end_dt
+            ]
+        return docs
+
+    def build_messages(self, query, combined_text):
+        # Very strict system prompt for short factual answers
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "You are a precise data summarizer for power outage reports. "
+                    "Answer in one short factual sentence using only the outage reports provided. "
+                    "Do not include speculation, reasoning, or follow-up questions. "
+                    "Do not restate the query or mention unavailable data. "
+                    "Output should be under 25 words, strictly factual."
+                ),
+            },
+            {
+                "role": "user",
+                "content": f"{query}\n\nOutage reports (date | region | events):\n{combined_text}",
+            },
+        ]
+
+    def _query_outage_reports(self, query, region=None, start_date=None, end_date=None):
         try:
-            docs = self.retriever.invoke(query)
-
-            # Deduplicate by metadata + content
-            unique_docs = {}
-            for doc in docs:
-                key = (doc.metadata.get("Date"), doc.metadata.get("Region"), doc.page_content)
-                unique_docs[key] = doc
-            docs = list(unique_docs.values())
-
-            # Apply date filtering if provided
             if start_date and end_date:
                 try:
-                    start_dt = datetime.strptime(start_date, "%d-%b-%Y")
-                    end_dt = datetime.strptime(end_date, "%d-%b-%Y")
+                    datetime.strptime(start_date, "%d-%b-%Y")
+                    datetime.strptime(end_date, "%d-%b-%Y")
                 except ValueError:
                     return "⚠️ Invalid date format. Use DD-MMM-YYYY (e.g., 08-Jan-2025)."
 
-                filtered_docs = [
-                    doc for doc in docs
-                    if "Date" in doc.metadata and
-                    start_dt <= datetime.strptime(doc.metadata["Date"], "%d-%b-%Y") <= end_dt
-                ]
-            else:
-                filtered_docs = docs
-
+            trace = current_trace()
+            start = time.perf_counter()
+            filtered_docs = self.retrieve_documents(query, region, start_date, end_date)
+            if trace is not None:
+                trace.add_retrieval(query, region, start_date, end_date, len(filtered_docs), time.perf_counter() - start)
             if not filtered_docs:
                 return "No relevant outage reports found."
 
-            # Combine context but keep it internal
-            combined_text = "\n".join([doc.page_content for doc in filtered_docs])
-
-            # Very strict system prompt for short factual answers
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a precise data summarizer for power outage reports. "
-                        "Answer in one short factual sentence using only the known data. "
-                        "Do not include speculation, reasoning, or follow-up questions. "
-                        "Do not restate the query or mention unavailable data. "
-                        "Output should be under 25 words, strictly factual."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": f"{query}\n\n[The agent has access to outage data internally.]",
-                },
-            ]
+            # Deduplicated, grouped evidence that fits the token budget
+            combined_text, _ = self.packer.pack(filtered_docs)
 
-            response = self.client.chat.completions.create(
-                model=self.model_id,
-                messages=messages,
+            messages = self.build_messages(query, combined_text)
+            start = time.perf_counter()
+            text = self.backend.chat(
+                messages,
                 max_tokens=60,
                 temperature=0.0,  # fully deterministic and concise
-            )
+            ).strip()
+            if trace is not None:
+                trace.add_llm(type(self.backend).__name__, time.perf_counter() - start,
+                              sum(len(m["content"]) for m in messages), len(text))
 
-            if not response.choices or not response.choices[0].message:
+            if not text:
                 return "⚠️ No output from Zephyr model."
 
-            text = response.choices[0].message["content"].strip()
             clean_text = re.sub(r"\[/?(INST|USER|ASS)\]", "", text).strip()
             return clean_text
 
         except Exception as e:
             return f"⚠️ Error during inference: {str(e)}"
-
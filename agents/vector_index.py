@@ -0,0 +1,198 @@
+import json
+import os
+from datetime import datetime
+import numpy as np
+from energy_agentic_ai.agents.embeddings import embed_queries
+
+# -----------------------------------------------------------------------------------
+#  Compact memory-mapped vector index for outage reports.
+#  Embeddings are stored as one contiguous float16 (or int8 + per-row scale)
+#  matrix that every worker process memory-maps read-only, so the OS page
+#  cache holds a single shared copy. Search is a batched matrix product with
+#  vectorized Region/Date masks applied before top-k selection.
+# -----------------------------------------------------------------------------------
+
+_EPOCH = datetime(1970, 1, 1)
+_NO_DATE = np.iinfo(np.int32).min
+
+
+def _to_day(value, date_format="%d-%b-%Y"):
+    """'08-Jan-2025' -> days since epoch, or _NO_DATE if missing/unparseable."""
+    try:
+        return (datetime.strptime(str(value), date_format) - _EPOCH).days
+    except (TypeError, ValueError):
+        return _NO_DATE
+
+
+def _normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class MmapVectorIndex:
+    VECTORS_FILE = "vectors.npy"
+    SCALES_FILE = "scales.npy"
+    REGIONS_FILE = "regions.npy"
+    DAYS_FILE = "days.npy"
+    TEXTS_FILE = "texts.json"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, path, embedding=None, block_rows=65536):
+        """Open an index written by build(). Arrays are memory-mapped read-only."""
+        self.path = path
+        self.embedding = embedding
+        self.block_rows = block_rows
+
+        with open(os.path.join(path, self.MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.dtype = self.manifest["dtype"]
+        self.region_names = self.manifest["regions"]
+        self.region_codes = {name: code for code, name in enumerate(self.region_names)}
+
+        self.vectors = np.load(os.path.join(path, self.VECTORS_FILE), mmap_mode="r")
+        self.scales = (
+            np.load(os.path.join(path, self.SCALES_FILE), mmap_mode="r")
+            if self.dtype == "int8" else None
+        )
+        self.regions = np.load(os.path.join(path, self.REGIONS_FILE), mmap_mode="r")
+        self.days = np.load(os.path.join(path, self.DAYS_FILE), mmap_mode="r")
+        # (texts, metadatas), loaded on first search and published as one tuple
+        self._payload = None
+
+    # -------------------------------
+    # Build
+    # -------------------------------
+    @classmethod
+    def build(cls, path, texts, metadatas, embedding, dtype="float16", batch_size=256):
+        """
+        Embed `texts` and write the index to `path`.
+        dtype: "float16" (default, ~half of float32) or "int8" (quarter, per-row scale).
+        """
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+        os.makedirs(path, exist_ok=True)
+
+        chunks = [
+            _normalize_rows(embedding.embed_documents(texts[i:i + batch_size]))
+            for i in range(0, len(texts), batch_size)
+        ]
+        matrix = np.vstack(chunks) if chunks else np.zeros((0, 0), dtype=np.float32)
+
+        if dtype == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+            np.save(os.path.join(path, cls.SCALES_FILE), scales.astype(np.float32))
+        else:
+            quantized = matrix.astype(np.float16)
+        np.save(os.path.join(path, cls.VECTORS_FILE), np.ascontiguousarray(quantized))
+
+        region_names = sorted({str(m.get("Region")) for m in metadatas})
+        codes = {name: code for code, name in enumerate(region_names)}
+        np.save(os.path.join(path, cls.REGIONS_FILE),
+                np.array([codes[str(m.get("Region"))] for m in metadatas], dtype=np.int32))
+        np.save(os.path.join(path, cls.DAYS_FILE),
+                np.array([_to_day(m.get("Date")) for m in metadatas], dtype=np.int32))
+
+        with open(os.path.join(path, cls.TEXTS_FILE), "w") as f:
+            json.dump({"texts": list(texts), "metadatas": list(metadatas)}, f)
+        with open(os.path.join(path, cls.MANIFEST_FILE), "w") as f:
+            json.dump({"dtype": dtype, "count": len(texts), "dim": int(matrix.shape[1]) if len(texts) else 0,
+                       "regions": region_names}, f)
+        return cls(path, embedding=embedding)
+
+    # -------------------------------
+    # Search
+    # -------------------------------
+    def __len__(self):
+        return int(self.vectors.shape[0])
+
+    def _load_texts(self):
+        """(texts, metadatas); a single assignment, so concurrent searches never see one without the other."""
+        payload = self._payload
+        if payload is None:
+            with open(os.path.join(self.path, self.TEXTS_FILE)) as f:
+                data = json.load(f)
+            payload = self._payload = (data["texts"], data["metadatas"])
+        return payload
+
+    def filter_mask(self, region=None, start_date=None, end_date=None):
+        """Boolean row mask for region and inclusive '%d-%b-%Y' date bounds, or None if unfiltered."""
+        mask = None
+        if region is not None:
+            code = self.region_codes.get(region)
+            mask = np.zeros(len(self), dtype=bool) if code is None else (self.regions == code)
+        if start_date or end_date:
+            days = np.asarray(self.days)
+            date_mask = days != _NO_DATE
+            if start_date:
+                date_mask &= days >= _to_day(start_date)
+            if end_date:
+                date_mask &= days <= _to_day(end_date)
+            mask = date_mask if mask is None else mask & date_mask
+        return mask
+
+    def search_vectors(self, query_vectors, k=10, region=None, start_date=None, end_date=None):
+        """
+        Batched search. query_vectors has shape (n_queries, dim).
+        Returns (indices, scores), each (n_queries, <=k), best first.
+        """
+        queries = _normalize_rows(np.atleast_2d(query_vectors))
+        n = len(self)
+        scores = np.empty((queries.shape[0], n), dtype=np.float32)
+        for start in range(0, n, self.block_rows):
+            block = np.asarray(self.vectors[start:start + self.block_rows], dtype=np.float32)
+            block_scores = queries @ block.T
+            if self.scales is not None:
+                block_scores *= np.asarray(self.scales[start:start + self.block_rows])
+            scores[:, start:start + block.shape[0]] = block_scores
+
+        mask = self.filter_mask(region, start_date, end_date)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+            k = min(k, int(mask.sum()))
+        k = min(k, n)
+        if k <= 0:
+            empty = np.zeros((queries.shape[0], 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def _documents(self, indices):
+        from langchain_core.documents import Document
+
+        texts, metadatas = self._load_texts()
+        return [Document(page_content=texts[i], metadata=metadatas[i]) for i in indices]
+
+    def similarity_search_batch(self, queries, k=10, region=None, start_date=None, end_date=None):
+        """Embed and search many queries at once; returns one Document list per query."""
+        if not queries:
+            return []
+        query_vectors = embed_queries(self.embedding, queries)
+        indices, _ = self.search_vectors(query_vectors, k, region, start_date, end_date)
+        return [self._documents(row) for row in indices]
+
+    def similarity_search(self, query, k=10, region=None, start_date=None, end_date=None):
+        query_vector = self.embedding.embed_query(query)
+        indices, _ = self.search_vectors([query_vector], k, region, start_date, end_date)
+        return self._documents(indices[0])
+
+    def as_retriever(self, search_kwargs=None):
+        return MmapRetriever(self, **(search_kwargs or {}))
+
+
+class MmapRetriever:
+    """Minimal retriever with the invoke(query) interface the agents use."""
+
+    def __init__(self, index, k=10, **filters):
+        self.index = index
+        self.k = k
+        self.filters = filters
+
+    def invoke(self, query, **filters):
+        return self.index.similarity_search(query, k=self.k, **{**self.filters, **filters})
@@ -8,23 +8,25 @@ import importlib
 
 sys.path.append('/content')
 
-# Safe reload and import each agent file
-import energy_agentic_ai.agents.data_agent as data_agent
-importlib.reload(data_agent)
-import energy_agentic_ai.agents.analysis_agent as analysis_agent
-importlib.reload(analysis_agent)
-import energy_agentic_ai.agents.structured_report_agent as structured_report_agent
-importlib.reload(structured_report_agent)
-import energy_agentic_ai.agents.unstructured_report_agent as unstructured_report_agent
-importlib.reload(unstructured_report_agent)
-import energy_agentic_ai.agents.intent_agent as intent_agent
-importlib.reload(intent_agent)
+# Reload agent files after notebook edits (development only: ENERGY_DEV_RELOAD=1)
+if os.getenv("ENERGY_DEV_RELOAD") == "1":
+    import energy_agentic_ai.agents.data_agent as data_agent
+    importlib.reload(data_agent)
+    import energy_agentic_ai.agents.analysis_agent as analysis_agent
+    importlib.reload(analysis_agent)
+    import energy_agentic_ai.agents.structured_report_agent as structured_report_agent
+    importlib.reload(structured_report_agent)
+    import energy_agentic_ai.agents.unstructured_report_agent as unstructured_report_agent
+    importlib.reload(unstructured_report_agent)
+    import energy_agentic_ai.agents.intent_agent as intent_agent
+    importlib.reload(intent_agent)
 
 from energy_agentic_ai.agents.data_agent import DataAgent
 from energy_agentic_ai.agents.analysis_agent import AnalysisAgent
 from energy_agentic_ai.agents.structured_report_agent import StructuredReportAgent
 from energy_agentic_ai.agents.unstructured_report_agent import UnstructuredReportAgent
 from energy_agentic_ai.agents.intent_agent import IntentAgent
+from energy_agentic_ai.pipeline import QueryPipeline
 
 # Set your HUGGINGFACEHUB_API_TOKEN
 os.environ["HUGGINGFACEHUB_API_TOKEN"] = "<hf_your_token_here>"
@@ -61,7 +63,7 @@ with col2:
 # Initialize session state
 # -------------------------------
 for key in ["data_agent", "analysis_agent", "structured_report_agent", "unstructured_report_agent", "intent_parser",
-            "peak_demand", "outage_summary", "query"]:
+            "pipeline", "peak_demand", "outage_summary", "query"]:
     if key not in st.session_state:
         st.session_state[key] = None
 
@@ -108,12 +110,18 @@ def initialize_agents():
             region_list = sorted(consumption_df['Region'].unique().tolist())
             intent_agent = IntentAgent(region_list=region_list)
 
+            # One pipeline per set of agents; release the previous one's worker pools
+            if st.session_state.pipeline is not None:
+                st.session_state.pipeline.close()
+            pipeline = QueryPipeline(intent_agent, analysis_agent, structured_report_agent, unstructured_report_agent)
+
             st.session_state.update({
                 "data_agent": data_agent,
                 "analysis_agent": analysis_agent,
                 "structured_report_agent": structured_report_agent,
                 "unstructured_report_agent": unstructured_report_agent,
-                "intent_agent": intent_agent
+                "intent_agent": intent_agent,
+                "pipeline": pipeline
             })
             return True
 
@@ -166,56 +174,9 @@ if send and query.strip() != "":
     unstructured_report_agent = st.session_state.unstructured_report_agent
     intent_agent = st.session_state.intent_agent
 
-    # Parse intent
-    intent = intent_agent.parse(query)
-    action = intent.get("action")
-    region = intent.get("region")
-    year = intent.get("year")
-    start_date = intent.get("start_date")
-    end_date = intent.get("end_date")
-
-    # Route to appropriate AnalysisAgent method
-    # ---------------------------
-    if action == "peak_demand":
-        query_lower = query.lower()
-        if "each region" in query_lower or "by region" in query_lower or "all regions" in query_lower:
-            result_data = analysis_agent.get_regional_peak_summary()
-        else:
-            result_data = analysis_agent.get_peak_demand(region, start_date, end_date)
-        result = structured_report_agent.generate_report(result_data, query)
-
-    elif action == "all_demands":
-        result_data = analysis_agent.get_all_demands(region, start_date, end_date)
-        result = structured_report_agent.generate_report(result_data, query)
-
-    elif action == "total_demand":
-        result_data = analysis_agent.get_total_demand(region, start_date, end_date)
-        result = structured_report_agent.generate_report(result_data, query)
-
-    elif action == "average_demand":
-        result_data = analysis_agent.get_average_demand(region, start_date, end_date)
-        result = structured_report_agent.generate_report(result_data, query)
-
-    elif action == "average_outage_duration":
-        if region:
-            result_data = analysis_agent.get_average_outage_duration(region, year)
-        else:
-            result_data = analysis_agent.get_average_outage_duration(None, year)
-        result = structured_report_agent.generate_outage_summary(result_data, query)
-
-    elif action == "structured_outage_summary":
-        result_data = analysis_agent.summarize_outages_by_region(region, year, start_date, end_date)
-        result = structured_report_agent.generate_outage_summary(result_data, query)
-
-    elif action == "anomaly_detection":
-        result_data = analysis_agent.run_anomaly_detection()
-        result = structured_report_agent.simple_text_report(result_data)
-
-    elif action == "free_text" or action == "outage_summary":
-        # Route to unstructured LLM retrieval agent
-        result = unstructured_report_agent.query_outage_reports(query, region, start_date, end_date)
-    else:
-        result = "Sorry, I could not understand your query. Try asking about 'peak demand', 'total demand', 'average demand', 'outage summary', or 'average outage duration'."
+    # Parse intent and route to the analysis / report agents
+    pipeline = st.session_state.pipeline
+    result = pipeline.answer(query)
 
     margin, col1, col2 = st.columns([0.3, 0.2, 6])
     with col1:
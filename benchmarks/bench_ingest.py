@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+from energy_agentic_ai.agents.data_agent import ingest_files, read_csv_file
+
+# -----------------------------------------------------------------------------------
+#  Multi-file ingestion throughput.
+#  Splits the bundled consumption data into one CSV per region per month (the
+#  way utilities deliver it), repeated over --years copies shifted back in
+#  time, writing each file in one of several date styles. Then times
+#  ingest_files() over the directory with 1..N workers and checks every run
+#  yields all rows, with the same dates as the first run.
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.bench_ingest --years 20 --workers 1 2 4 8
+# -----------------------------------------------------------------------------------
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+# Date style of each written file, chosen round-robin
+DATE_STYLES = ["%m/%d/%Y", "%Y-%m-%d", "%d-%b-%Y", "%Y-%m-%d %H:%M:%S"]
+
+
+def write_monthly_files(data_dir, output_dir, years):
+    table = read_csv_file(os.path.join(data_dir, "consumption.csv"))
+    consumption = table.to_pandas()
+    consumption["Date"] = pd.to_datetime(consumption["Date"])
+    # Copies are shifted by the whole span so their months never overlap
+    span = consumption["Date"].dt.year.max() - consumption["Date"].dt.year.min() + 1
+    count = 0
+    for shift in range(years):
+        shifted = consumption.assign(Date=consumption["Date"] - pd.DateOffset(years=shift * span))
+        for (region, month), part in shifted.groupby(["Region", shifted["Date"].dt.to_period("M")]):
+            style = DATE_STYLES[count % len(DATE_STYLES)]
+            target = os.path.join(output_dir, region, f"{month}.csv")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            part.assign(Date=part["Date"].dt.strftime(style)).to_csv(target, index=False)
+            count += 1
+    return count, len(consumption) * years
+
+
+def time_ingest(output_dir, workers, executor, repeat):
+    timings = []
+    table = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        table = ingest_files(output_dir, workers=workers, executor=executor)
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    return table, {"workers": workers, "seconds": round(best, 4), "rows_per_s": int(table.num_rows / best)}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark parallel multi-file CSV ingestion.")
+    arg_parser.add_argument("--data-dir", default=DATA_DIR)
+    arg_parser.add_argument("--years", type=int, default=20)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = arg_parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="consumption_monthly_")
+    try:
+        files, expected_rows = write_monthly_files(args.data_dir, output_dir, args.years)
+        reference = None
+        runs = []
+        for workers in args.workers:
+            table, result = time_ingest(output_dir, workers, args.executor, args.repeat)
+            frame = table.to_pandas().sort_values(["Region", "Date"], ignore_index=True)
+            if reference is None:
+                reference = frame
+            result["matches_reference"] = bool(frame.equals(reference)) and len(frame) == expected_rows
+            runs.append(result)
+        report = {"files": files, "rows": len(reference), "executor": args.executor,
+                  "cpu_count": os.cpu_count(), "runs": runs}
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import random
+import time
+from energy_agentic_ai.agents.intent_agent import IntentAgent, _parse_key
+
+# -----------------------------------------------------------------------------------
+#  Bulk intent parsing of an archived query log.
+#  Generates a synthetic log from question templates (regions, absolute and
+#  relative dates, ranges; a share of exact repeats and whitespace variants)
+#  and times:
+#    - IntentAgent.parse one query at a time
+#    - IntentAgent.parse_many in this process (de-duplication + date caches)
+#    - IntentAgent.parse_many on a process pool
+#  Every run is checked against the one-at-a-time results.
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.bench_intents --queries 200000 --repeat-share 0.8
+# -----------------------------------------------------------------------------------
+
+REGIONS = ["CISO", "ERCO", "ISNE", "MISO", "NYIS", "PJM"]
+TEMPLATES = [
+    "peak demand in {region} in {year}",
+    "total demand for {region} between {month} {day}, {year} and {month} {day2}, {year}",
+    "average demand monthly for {region} and PJM this year",
+    "outage summary last month for {region}",
+    "how many outages in {region} last week",
+    "top {n} peak demand days in {region} on {month} {day}, {year}",
+    "demand in {region} from {year}-01-01 to {year}-03-31",
+    "summarize outage reports for {region} yesterday",
+]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September"]
+
+
+def make_log(n, repeat_share, seed=0):
+    rng = random.Random(seed)
+    log = []
+    for _ in range(n):
+        if log and rng.random() < repeat_share:
+            query = rng.choice(log)
+            log.append(query + " " if rng.random() < 0.2 else query)
+            continue
+        log.append(rng.choice(TEMPLATES).format(
+            region=rng.choice(REGIONS), year=rng.randint(2015, 2025), month=rng.choice(MONTHS),
+            day=rng.randint(1, 9), day2=rng.randint(10, 28), n=rng.randint(2, 10),
+        ))
+    return log
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark batch intent parsing.")
+    arg_parser.add_argument("--queries", type=int, default=200000)
+    arg_parser.add_argument("--repeat-share", type=float, default=0.8, help="Share of queries repeating an earlier one.")
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count())
+    arg_parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = arg_parser.parse_args()
+
+    log = make_log(args.queries, args.repeat_share)
+    agent = IntentAgent(region_list=REGIONS)
+
+    t0 = time.perf_counter()
+    reference = [agent.parse(_parse_key(query)) for query in log]
+    sequential = time.perf_counter() - t0
+
+    runs = {}
+    for name, processes in (("parse_many", 1), ("parse_many_pool", args.processes)):
+        t0 = time.perf_counter()
+        result = agent.parse_many(log, processes=processes)
+        elapsed = time.perf_counter() - t0
+        runs[name] = {"processes": processes, "seconds": round(elapsed, 3),
+                      "queries_per_s": int(len(log) / elapsed), "matches": result == reference}
+
+    report = {
+        "queries": len(log),
+        "distinct": len(set(map(_parse_key, log))),
+        "parse": {"seconds": round(sequential, 3), "queries_per_s": int(len(log) / sequential)},
+        **runs,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
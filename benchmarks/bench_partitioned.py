@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import pandas as pd
+from energy_agentic_ai.agents.data_agent import write_partitioned_dataset, apply_schema, CONSUMPTION_SCHEMA, OUTAGE_SCHEMA
+from energy_agentic_ai.agents.analysis_agent import AnalysisAgent
+
+# -----------------------------------------------------------------------------------
+#  Scan pruning on a growing consumption archive.
+#  Builds synthetic histories of increasing length (the bundled data shifted
+#  back year by year), writes each as a Hive-partitioned Parquet dataset and
+#  times single-region / single-month queries against:
+#    - the in-memory snapshot (full table scan)
+#    - the partitioned dataset (partition + row-group pruning)
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.bench_partitioned --years 1 10 40 --queries 200
+# -----------------------------------------------------------------------------------
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def build_history(data_dir, years):
+    consumption = apply_schema(pd.read_csv(os.path.join(data_dir, "consumption.csv")), CONSUMPTION_SCHEMA)
+    outages = apply_schema(pd.read_csv(os.path.join(data_dir, "outages.csv")), OUTAGE_SCHEMA)
+    dates = pd.to_datetime(consumption["Date"].astype("datetime64[s]"))
+    frames = []
+    for shift in range(years):
+        shifted = (dates - pd.DateOffset(years=shift)).dt.date
+        frames.append(consumption.assign(Date=pd.array(shifted, dtype=consumption["Date"].dtype)))
+    return pd.concat(frames, ignore_index=True), outages
+
+
+def make_queries(consumption, n, seed=0):
+    rng = random.Random(seed)
+    regions = sorted(consumption["Region"].unique().tolist())
+    days = pd.to_datetime(consumption["Date"].astype("datetime64[s]"))
+    months = sorted({(d.year, d.month) for d in days})
+    queries = []
+    for _ in range(n):
+        year, month = rng.choice(months)
+        start = pd.Timestamp(year=year, month=month, day=1)
+        end = start + pd.offsets.MonthEnd(0)
+        queries.append((rng.choice(regions), f"{start:%d-%b-%Y}", f"{end:%d-%b-%Y}"))
+    return queries
+
+
+def time_queries(agent, queries):
+    latencies = []
+    for region, start, end in queries:
+        t0 = time.perf_counter()
+        agent.get_total_demand(region, start, end)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    return {
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def files_read(agent, query):
+    region, start, end = query
+    compiled = agent.compiler.compile({"action": "total_demand", "regions": [region],
+                                       "start_date": start, "end_date": end})
+    plan = agent._cursor().execute("EXPLAIN ANALYZE " + compiled.sql, compiled.params).fetchall()[0][1]
+    marker = "Total Files Read:"
+    if marker not in plan:
+        return None
+    return int(plan.split(marker, 1)[1].split()[0])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark partitioned Parquet scans against in-memory tables.")
+    arg_parser.add_argument("--data-dir", default=DATA_DIR)
+    arg_parser.add_argument("--years", type=int, nargs="+", default=[1, 10, 40])
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = arg_parser.parse_args()
+
+    report = []
+    for years in args.years:
+        consumption, outages = build_history(args.data_dir, years)
+        queries = make_queries(consumption, args.queries)
+        dataset_dir = tempfile.mkdtemp(prefix="consumption_parquet_")
+        try:
+            write_partitioned_dataset(dataset_dir, consumption, outages)
+            in_memory = AnalysisAgent(consumption, outages)
+            partitioned = AnalysisAgent(os.path.join(dataset_dir, "consumption"), os.path.join(dataset_dir, "outages"))
+            report.append({
+                "years": years,
+                "rows": len(consumption),
+                "in_memory": time_queries(in_memory, queries),
+                "partitioned": dict(time_queries(partitioned, queries), files_read=files_read(partitioned, queries[0])),
+            })
+        finally:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from energy_agentic_ai.utils import normalize_datetime
+from energy_agentic_ai.agents.data_agent import DataAgent
+from energy_agentic_ai.agents.llm_backend import StubBackend
+from energy_agentic_ai.agents.unstructured_report_agent import UnstructuredReportAgent
+
+# -----------------------------------------------------------------------------------
+#  Quality vs latency of the outage-report RAG path.
+#  A labeled query set is derived from data/outages.csv: each query asks for
+#  one event type in one region and month, and every report with that
+#  region, event type and month is relevant. Queries run through the real
+#  DataAgent.embed_outage_reports + UnstructuredReportAgent retrieval path:
+#    - recall@k and MRR of the retrieved reports
+#    - filter correctness (share of returned reports inside the region/date filter)
+#    - per-stage latency: query embedding, retrieval, context packing, LLM
+#  Runs offline by default (hashing embeddings, in-process stub LLM) and
+#  writes a JSON report; --baseline prints the change against a previous one.
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.bench_retrieval --backends mmap chroma --output retrieval.json
+#    python -m energy_agentic_ai.benchmarks.bench_retrieval --baseline retrieval.json
+# -----------------------------------------------------------------------------------
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# (event type, pattern on Report_Text, how a user would ask about it); first match wins
+EVENT_TYPES = [
+    ("customer_loss", r"loss of electric service to more than", "large customer power outages"),
+    ("facility_damage", r"damage or destruction", "damage or destruction of facilities"),
+    ("physical_threat", r"physical threat", "physical threats to facilities"),
+    ("physical_attack", r"physical attack", "physical attacks on the grid"),
+    ("transmission_loss", r"transmission loss", "unexpected transmission losses"),
+    ("control_loss", r"loss of monitoring or control|interpersonal communication", "control center monitoring failures"),
+    ("public_appeal", r"public appeal", "public appeals to conserve electricity"),
+    ("evacuation", r"evacuation", "control center evacuations"),
+    ("load_shedding", r"load shedding|firm system loads", "firm load shedding"),
+    ("islanding", r"islanding", "system separation or islanding"),
+    ("fuel_emergency", r"fuel supply", "fuel supply emergencies"),
+    ("cyber", r"cyber", "cyber security incidents"),
+    ("generation_loss", r"generation loss|off-site power", "loss of generation"),
+    ("voltage_reduction", r"voltage reduction", "voltage reductions"),
+    ("system_failure", r"operational failure", "transmission or distribution system failures"),
+]
+STAGES = ["embed", "retrieve", "pack", "llm"]
+
+
+def event_type(text):
+    text = str(text).lower()
+    for name, pattern, _ in EVENT_TYPES:
+        if re.search(pattern, text):
+            return name
+    return "other"
+
+
+def label_corpus(outage_df):
+    """Per report: Region, Date ('%d-%b-%Y'), Month (Timestamp of the 1st) and event type."""
+    labels = pd.DataFrame({
+        "Region": outage_df["Region"].astype(str).str.strip(),
+        "Date": [normalize_datetime(d) for d in outage_df["Date"]],
+        "EventType": outage_df["Report_Text"].map(event_type),
+    })
+    labels["Month"] = pd.to_datetime(labels["Date"], format="%d-%b-%Y").dt.to_period("M").dt.to_timestamp()
+    return labels
+
+
+def make_query_set(labels, n, seed=0):
+    """
+    One query per sampled (region, event type, month) group. Half carry the
+    region/date filters the pipeline would pass, half only name them in the text.
+    """
+    rng = random.Random(seed)
+    phrases = {name: phrase for name, _, phrase in EVENT_TYPES}
+    groups = labels[labels["EventType"] != "other"].groupby(["Region", "EventType", "Month"]).groups
+    keys = sorted(groups)
+    queries = []
+    for i in range(n):
+        region, kind, month = rng.choice(keys)
+        start = month
+        end = month + pd.offsets.MonthEnd(0)
+        filtered = i % 2 == 0
+        text = f"{phrases[kind]} in {region}" + ("" if filtered else f" in {month:%B %Y}")
+        queries.append({
+            "query": text,
+            "region": region,
+            "event_type": kind,
+            "start_date": f"{start:%d-%b-%Y}",
+            "end_date": f"{end:%d-%b-%Y}",
+            "filtered": filtered,
+            "relevant": sorted(int(j) for j in groups[(region, kind, month)]),
+        })
+    return queries
+
+
+def _percentiles(samples):
+    return {"p50_ms": round(float(np.percentile(samples, 50)) * 1000, 3),
+            "p95_ms": round(float(np.percentile(samples, 95)) * 1000, 3)}
+
+
+def _doc_key(doc):
+    # Same identity the agent de-duplicates on
+    return doc.metadata.get("Date"), doc.metadata.get("Region"), doc.page_content
+
+
+def evaluate(agent, queries, doc_keys, ks):
+    timings = {stage: [] for stage in STAGES}
+    recall = {k: [] for k in ks}
+    reciprocal_ranks = []
+    date_ok, region_ok, empty = [], [], 0
+
+    for q in queries:
+        start_date, end_date = (q["start_date"], q["end_date"]) if q["filtered"] else (None, None)
+        region = q["region"] if q["filtered"] else None
+
+        t0 = time.perf_counter()
+        agent.embedding.embed_query(q["query"])
+        t1 = time.perf_counter()
+        docs = agent.retrieve_documents(q["query"], region, start_date, end_date)
+        t2 = time.perf_counter()
+        context, _ = agent.packer.pack(docs)
+        t3 = time.perf_counter()
+        agent.backend.chat(agent.build_messages(q["query"], context), max_tokens=60, temperature=0.0)
+        t4 = time.perf_counter()
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            timings[stage].append(elapsed)
+
+        relevant = {doc_keys[i] for i in q["relevant"]}
+        found = [_doc_key(doc) for doc in docs]
+        for k in ks:
+            recall[k].append(len(set(found[:k]) & relevant) / min(k, len(relevant)))
+        rank = next((i + 1 for i, key in enumerate(found) if key in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+        if not docs:
+            empty += 1
+        if q["filtered"]:
+            first = pd.Timestamp(q["start_date"])
+            last = pd.Timestamp(q["end_date"])
+            for date, region, _ in found:
+                date_ok.append(first <= pd.Timestamp(date) <= last)
+                region_ok.append(str(region).strip() == q["region"])
+
+    totals = [sum(parts) for parts in zip(*(timings[stage] for stage in STAGES))]
+    return {
+        **{f"recall@{k}": round(float(np.mean(recall[k])), 4) for k in ks},
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        "empty_result_rate": round(empty / len(queries), 4),
+        "filter": {
+            "date_precision": round(float(np.mean(date_ok)), 4) if date_ok else None,
+            "region_precision": round(float(np.mean(region_ok)), 4) if region_ok else None,
+        },
+        "latency": {**{stage: _percentiles(timings[stage]) for stage in STAGES}, "total": _percentiles(totals)},
+    }
+
+
+def build_agent(backend, data_agent, path, top_k, llm_latency):
+    data_agent.vector_backend = backend
+    data_agent.embed_outage_reports(persist_dir=path)
+    agent = UnstructuredReportAgent(chroma_path=path, index_path=path, vector_backend=backend, top_k=top_k,
+                                    backend=StubBackend(latency=llm_latency))
+    agent.retriever  # open the store before timing
+    return agent
+
+
+def compare(report, baseline):
+    """Metric-by-metric change against a previous report (same keys only)."""
+    changes = {}
+    for backend, result in report["results"].items():
+        previous = baseline.get("results", {}).get(backend)
+        if not previous:
+            continue
+        rows = {}
+        for key, value in result.items():
+            if key.startswith("recall@") or key in ("mrr", "empty_result_rate"):
+                rows[key] = (previous.get(key), value)
+        for key, value in result["filter"].items():
+            rows[f"filter.{key}"] = (previous.get("filter", {}).get(key), value)
+        for stage, value in result["latency"].items():
+            rows[f"{stage}.p50_ms"] = (previous.get("latency", {}).get(stage, {}).get("p50_ms"), value["p50_ms"])
+        changes[backend] = {
+            key: {"before": before, "after": after,
+                  "delta": round(after - before, 4) if before is not None and after is not None else None}
+            for key, (before, after) in rows.items()
+        }
+    return changes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark retrieval quality and latency of the outage RAG path.")
+    arg_parser.add_argument("--data-dir", default=DATA_DIR)
+    arg_parser.add_argument("--backends", nargs="+", choices=["mmap", "chroma"], default=["mmap"])
+    arg_parser.add_argument("--embeddings", choices=["hashing", "huggingface"], default="hashing")
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    arg_parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the stub LLM sleeps per call.")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="Write the JSON report to this file.")
+    arg_parser.add_argument("--baseline", help="Previous JSON report to compare against.")
+    args = arg_parser.parse_args()
+
+    # Index build and query side must use the same embeddings
+    os.environ["ENERGY_EMBEDDINGS"] = args.embeddings
+    consumption_path = os.path.join(args.data_dir, "consumption.csv")
+    outage_path = os.path.join(args.data_dir, "outages.csv")
+    with open(consumption_path) as consumption_file, open(outage_path) as outage_file:
+        data_agent = DataAgent(consumption_file, outage_file, embed=False)
+    with open(outage_path, "rb") as f:
+        fingerprint = hashlib.sha256(f.read()).hexdigest()[:16]
+
+    labels = label_corpus(data_agent.outage_df)
+    queries = make_query_set(labels, args.queries, args.seed)
+    # (Date, Region, text) of every report, as stored by embed_outage_reports
+    doc_keys = [(d, r, f"Date: {d}, Region: {r}, Report: {t}")
+                for d, r, t in zip(labels["Date"], data_agent.outage_df["Region"], data_agent.outage_df["Report_Text"])]
+
+    ks = sorted(set(args.k))
+    report = {
+        "config": {"embeddings": args.embeddings, "queries": len(queries), "k": ks, "seed": args.seed,
+                   "llm_latency_s": args.llm_latency},
+        "dataset": {"documents": len(labels), "outages_sha256": fingerprint,
+                    "event_types": labels["EventType"].value_counts().to_dict()},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as path:
+        for backend in args.backends:
+            agent = build_agent(backend, data_agent, os.path.join(path, backend), max(ks), args.llm_latency)
+            report["results"][backend] = evaluate(agent, queries, doc_keys, ks)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["compared_to"] = {
+            "path": args.baseline,
+            "same_config": baseline.get("config") == report["config"] and baseline.get("dataset") == report["dataset"],
+            "changes": compare(report, baseline),
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
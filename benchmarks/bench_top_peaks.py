@@ -0,0 +1,81 @@
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from energy_agentic_ai.agents.analysis_agent import AnalysisAgent
+
+# -----------------------------------------------------------------------------------
+#  Top-N peak days on a synthetic many-region hourly archive.
+#  For each region count, builds `--years` of hourly readings per region and
+#  times AnalysisAgent.get_top_peaks (one windowed ROW_NUMBER/QUALIFY pass)
+#  overall and per month, next to the former correlated-MAX-subquery
+#  regional peak query.
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.bench_top_peaks --regions 100 1000 --years 2
+# -----------------------------------------------------------------------------------
+
+CORRELATED_PEAK_SQL = """
+    SELECT Region, Demand_MW AS PeakDemand, Day
+    FROM df_consumption_var AS t1
+    WHERE Demand_MW = (
+        SELECT MAX(Demand_MW)
+        FROM df_consumption_var AS t2
+        WHERE t2.Region = t1.Region
+    )
+    ORDER BY Region
+"""
+
+
+def build_hourly(regions, years, seed=0):
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2020-01-01", periods=years * 365 * 24, freq="h")
+    names = [f"R{i:05d}" for i in range(regions)]
+    return pd.DataFrame({
+        "Date": np.tile(hours.values, regions),
+        "Region": np.repeat(names, len(hours)),
+        "Demand_MW": rng.integers(1_000, 100_000, size=regions * len(hours), dtype=np.int32),
+        "Supply_MW": rng.integers(1_000, 100_000, size=regions * len(hours), dtype=np.int32),
+    })
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return round(min(timings) * 1000, 1)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark top-N peak day queries.")
+    arg_parser.add_argument("--regions", type=int, nargs="+", default=[100, 1000])
+    arg_parser.add_argument("--years", type=int, default=2)
+    arg_parser.add_argument("--n", type=int, default=5)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = arg_parser.parse_args()
+
+    report = []
+    for regions in args.regions:
+        agent = AnalysisAgent(build_hourly(regions, args.years))
+        cursor = agent._cursor()
+        rows = cursor.execute("SELECT COUNT(*) FROM df_consumption_var").fetchone()[0]
+        report.append({
+            "regions": regions,
+            "rows": rows,
+            "top_peaks_ms": best_of(lambda: agent.get_top_peaks(n=args.n), args.repeat),
+            "top_peaks_per_month_ms": best_of(lambda: agent.get_top_peaks(n=args.n, per="month"), args.repeat),
+            "correlated_subquery_ms": best_of(lambda: cursor.execute(CORRELATED_PEAK_SQL).fetchdf(), args.repeat),
+        })
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from energy_agentic_ai.utils import normalize_datetime
+from energy_agentic_ai.agents.vector_index import MmapVectorIndex, _normalize_rows
+from energy_agentic_ai.agents.embeddings import load_embeddings
+
+# -----------------------------------------------------------------------------------
+#  Recall and latency of MmapVectorIndex (float16 / int8) versus ChromaDB.
+#  Ground truth is exact float32 cosine search over the same embeddings.
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.bench_vector_index --queries 200 --k 10
+# -----------------------------------------------------------------------------------
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+class _PrecomputedEmbeddings:
+    """Serves already-computed vectors so every backend indexes identical embeddings."""
+
+    def __init__(self, model, cache):
+        self.model = model
+        self.cache = cache
+
+    def _embed(self, texts):
+        missing = [t for t in texts if t not in self.cache]
+        if missing:
+            for text, vector in zip(missing, self.model.embed_documents(missing)):
+                self.cache[text] = vector
+        return [self.cache[t] for t in texts]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts))
+
+    def embed_query(self, text):
+        return self._embed([text])[0]
+
+
+def _percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def _recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / max(1, len(t)) for f, t in zip(found, truth)]))
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def load_corpus(outage_csv):
+    df = pd.read_csv(outage_csv)
+    df["Date"] = df["Date"].apply(normalize_datetime)
+    texts = [f"Date: {d}, Region: {r}, Report: {t}" for d, r, t in zip(df["Date"], df["Region"], df["Report_Text"])]
+    metadatas = [{"Date": str(d), "Region": r} for d, r in zip(df["Date"], df["Region"])]
+    return texts, metadatas
+
+
+def make_queries(metadatas, n, seed=0):
+    rng = random.Random(seed)
+    templates = [
+        "What outage happened in {Region} on {Date}?",
+        "Was there a cyber event in {Region}?",
+        "transmission loss reported by {Region} around {Date}",
+        "loss of monitoring or control capability in {Region}",
+    ]
+    return [rng.choice(templates).format(**rng.choice(metadatas)) for _ in range(n)]
+
+
+def bench_mmap(path, embedding, texts, metadatas, queries, truth, k, dtype):
+    start = time.perf_counter()
+    index = MmapVectorIndex.build(os.path.join(path, dtype), texts, metadatas, embedding, dtype=dtype)
+    build_s = time.perf_counter() - start
+
+    query_vectors = embedding.embed_documents(queries)
+    single = []
+    found = []
+    for vector in query_vectors:
+        t0 = time.perf_counter()
+        indices, _ = index.search_vectors([vector], k)
+        single.append(time.perf_counter() - t0)
+        found.append(indices[0].tolist())
+
+    t0 = time.perf_counter()
+    index.search_vectors(query_vectors, k)
+    batch_s = time.perf_counter() - t0
+
+    return {
+        "build_s": round(build_s, 3),
+        "disk_bytes": _dir_size(os.path.join(path, dtype)),
+        "vector_bytes": int(index.vectors.nbytes),
+        "recall_at_k": round(_recall(found, truth), 4),
+        "search_p50_ms": _percentile_ms(single, 50),
+        "search_p95_ms": _percentile_ms(single, 95),
+        "batch_ms_per_query": round(batch_s / len(queries) * 1000, 3),
+    }
+
+
+def bench_chroma(path, embedding, texts, metadatas, queries, truth, k):
+    from langchain_chroma import Chroma
+
+    ids = [str(i) for i in range(len(texts))]
+    start = time.perf_counter()
+    db = Chroma.from_texts(texts=texts, embedding=embedding, metadatas=metadatas, ids=ids,
+                           persist_directory=os.path.join(path, "chroma"))
+    build_s = time.perf_counter() - start
+
+    query_vectors = embedding.embed_documents(queries)
+    single = []
+    found = []
+    for vector in query_vectors:
+        t0 = time.perf_counter()
+        result = db._collection.query(query_embeddings=[vector], n_results=k, include=[])
+        single.append(time.perf_counter() - t0)
+        found.append([int(i) for i in result["ids"][0]])
+
+    return {
+        "build_s": round(build_s, 3),
+        "disk_bytes": _dir_size(os.path.join(path, "chroma")),
+        "recall_at_k": round(_recall(found, truth), 4),
+        "search_p50_ms": _percentile_ms(single, 50),
+        "search_p95_ms": _percentile_ms(single, 95),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark MmapVectorIndex against ChromaDB.")
+    arg_parser.add_argument("--outages", default=os.path.join(DATA_DIR, "outages.csv"))
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--skip-chroma", action="store_true")
+    arg_parser.add_argument("--embeddings", choices=["huggingface", "hashing"], default="huggingface")
+    arg_parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = arg_parser.parse_args()
+
+    texts, metadatas = load_corpus(args.outages)
+    queries = make_queries(metadatas, args.queries)
+    embedding = _PrecomputedEmbeddings(load_embeddings(backend=args.embeddings), {})
+
+    # Exact float32 ground truth
+    corpus = _normalize_rows(embedding.embed_documents(texts))
+    scores = _normalize_rows(embedding.embed_documents(queries)) @ corpus.T
+    truth = np.argsort(-scores, axis=1, kind="stable")[:, :args.k].tolist()
+
+    report = {"documents": len(texts), "queries": len(queries), "k": args.k, "float32_bytes": int(corpus.nbytes)}
+    with tempfile.TemporaryDirectory() as path:
+        for dtype in ("float16", "int8"):
+            report[f"mmap_{dtype}"] = bench_mmap(path, embedding, texts, metadatas, queries, truth, args.k, dtype)
+        if not args.skip_chroma:
+            report["chroma"] = bench_chroma(path, embedding, texts, metadatas, queries, truth, args.k)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
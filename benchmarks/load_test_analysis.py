@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from energy_agentic_ai.utils import normalize_datetime
+from energy_agentic_ai.agents.analysis_agent import AnalysisAgent
+
+# -----------------------------------------------------------------------------------
+#  Multi-threaded load test for a shared AnalysisAgent.
+#  Runs a randomized mix of demand/outage queries from 1..N threads and
+#  reports throughput and latency percentiles per thread count.
+#
+#  Usage:
+#    python -m energy_agentic_ai.benchmarks.load_test_analysis --threads 1 2 4 8 --requests 2000
+# -----------------------------------------------------------------------------------
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def load_frames(data_dir=DATA_DIR, scale=1):
+    consumption = pd.read_csv(os.path.join(data_dir, "consumption.csv"))
+    consumption["Date"] = consumption["Date"].apply(normalize_datetime)
+    outages = pd.read_csv(os.path.join(data_dir, "outages.csv"))
+    outages["Date"] = outages["Date"].apply(normalize_datetime)
+    if scale > 1:
+        consumption = pd.concat([consumption] * scale, ignore_index=True)
+    return consumption, outages
+
+
+def make_workload(agent, n, seed=0):
+    rng = random.Random(seed)
+    regions = sorted(agent.df_consumption["Region"].dropna().unique().tolist())
+    years = [2020, 2021, 2022, 2023, 2024]
+    calls = []
+    for _ in range(n):
+        region = rng.choice(regions + [None])
+        year = rng.choice(years)
+        month = rng.randint(1, 12)
+        start = f"01-{pd.Timestamp(year=year, month=month, day=1):%b}-{year}"
+        end = f"28-{pd.Timestamp(year=year, month=month, day=1):%b}-{year}"
+        kind = rng.randrange(5)
+        if kind == 0:
+            calls.append((agent.get_peak_demand, (region, start, end)))
+        elif kind == 1:
+            calls.append((agent.get_total_demand, (region, f"01-Jan-{year}", f"31-Dec-{year}")))
+        elif kind == 2:
+            calls.append((agent.get_average_demand, (region, start, end)))
+        elif kind == 3:
+            calls.append((agent.summarize_outages_by_region, (region, year, f"01-Jan-{year}", f"31-Dec-{year}")))
+        else:
+            calls.append((agent.get_average_outage_duration, (region, year)))
+    return calls
+
+
+def run(agent, calls, threads):
+    def timed(call):
+        fn, args = call
+        t0 = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - t0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(timed, calls))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "threads": threads,
+        "requests": len(calls),
+        "qps": round(len(calls) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Concurrent AnalysisAgent load test.")
+    arg_parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--requests", type=int, default=2000)
+    arg_parser.add_argument("--scale", type=int, default=1, help="Replicate consumption rows N times.")
+    arg_parser.add_argument("--duckdb-threads", type=int, default=None)
+    arg_parser.add_argument("--memory-limit", default=None)
+    args = arg_parser.parse_args()
+
+    consumption, outages = load_frames(scale=args.scale)
+    agent = AnalysisAgent(consumption, outages, threads=args.duckdb_threads, memory_limit=args.memory_limit)
+    calls = make_workload(agent, args.requests)
+    run(agent, calls[:50], 1)  # warm-up
+
+    results = [run(agent, calls, threads) for threads in args.threads]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+# -----------------------------------------------------------------------------------
+#  Load generator for query_service.py.
+#  Opens N keep-alive connections, sends a mix of structured and outage
+#  questions, and reports RPS and latency percentiles per route.
+#
+#  Offline setup (three shells):
+#    python -m energy_agentic_ai.stub_llm_server --latency 0.3 --jitter 0.1
+#    ENERGY_LLM_BACKEND=openai python -m energy_agentic_ai.query_service --vector-backend mmap
+#    python -m energy_agentic_ai.benchmarks.load_test_service --concurrency 32 --requests 2000
+# -----------------------------------------------------------------------------------
+
+STRUCTURED_QUERIES = [
+    "What was the peak demand in {region} in {year}?",
+    "Total demand in {region} in {year}",
+    "Average demand for {region} in {year}",
+    "How many outages by region in {year}?",
+    "Average outage duration in {region}",
+]
+UNSTRUCTURED_QUERIES = [
+    "Was there an outage in {region} in {year}?",
+    "Summarize the cyber events reported by {region}",
+    "What blackout happened in {region} last month?",
+]
+REGIONS = ["CISO", "ERCO", "ISNE", "MISO", "NYIS", "PJM"]
+YEARS = [2021, 2022, 2023, 2024]
+
+
+def make_queries(n, llm_share=0.3, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        templates = UNSTRUCTURED_QUERIES if rng.random() < llm_share else STRUCTURED_QUERIES
+        queries.append(rng.choice(templates).format(region=rng.choice(REGIONS), year=rng.choice(YEARS)))
+    return queries
+
+
+async def _request(reader, writer, host, query):
+    body = json.dumps({"query": query}).encode("utf-8")
+    writer.write(
+        f"POST /query HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    payload = json.loads(await reader.readexactly(length)) if length else {}
+    return status, payload
+
+
+async def _worker(host, port, queue, samples):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                query = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                status, payload = await _request(reader, writer, host, query)
+                action = payload.get("action", "error")
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                status, action = 0, "error"
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+            samples.append((action, status, time.perf_counter() - start))
+    finally:
+        writer.close()
+
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 2)
+    return {"count": len(latencies), "p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99),
+            "max_ms": round(latencies[-1] * 1000, 2)}
+
+
+async def run(host, port, queries, concurrency):
+    queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+    samples = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, queue, samples) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ok = [s for s in samples if s[1] == 200]
+    report = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 1),
+        "overall": _percentiles([s[2] for s in ok]) if ok else {},
+        "by_action": {},
+    }
+    for action in sorted({s[0] for s in ok}):
+        report["by_action"][action] = _percentiles([s[2] for s in ok if s[0] == action])
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Load generator for the energy query service.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--requests", type=int, default=1000)
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--llm-share", type=float, default=0.3, help="Fraction of retrieval/LLM questions.")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    queries = make_queries(args.requests, args.llm_share, args.seed)
+    report = asyncio.run(run(args.host, args.port, queries, args.concurrency))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from energy_agentic_ai.slow_log import SlowQueryLog, current_trace, in_context, stage
+
+sys.path.append('/content')
+
+# -----------------------------------------------------------------------------------
+#  Routes a natural language query through IntentAgent to the analysis and
+#  report agents. Shared by main.py, app.py and the HTTP query service.
+# -----------------------------------------------------------------------------------
+
+STRUCTURED_ACTIONS = {
+    "peak_demand",
+    "all_demands",
+    "total_demand",
+    "average_demand",
+    "average_outage_duration",
+    "structured_outage_summary",
+    "outage_demand",
+    "anomaly_detection",
+}
+UNSTRUCTURED_ACTIONS = {"free_text", "outage_summary"}
+
+SECTION_TITLES = {
+    "peak_demand": "Peak demand",
+    "all_demands": "Demand",
+    "total_demand": "Total demand",
+    "average_demand": "Average demand",
+    "average_outage_duration": "Average outage duration",
+    "structured_outage_summary": "Outage totals",
+    "outage_demand": "Outage vs demand",
+    "anomaly_detection": "Anomalies",
+    "outage_summary": "Outage reports",
+    "free_text": "Outage reports",
+}
+
+UNKNOWN_QUERY_MESSAGE = (
+    "Sorry, I could not understand your query. Try asking about 'peak demand', 'total demand', "
+    "'average demand', 'outage summary', or 'average outage duration'."
+)
+
+
+class QueryPipeline:
+    def __init__(self, intent_agent, analysis_agent, structured_report_agent, unstructured_report_agent=None,
+                 unstructured_factory=None, sql_workers=None, llm_concurrency=8, slow_log=None):
+        """
+        unstructured_factory: optional zero-argument callable that builds the
+        UnstructuredReportAgent on the first retrieval question, so SQL-only
+        sessions never load the embedding model or vector store.
+        sql_workers / llm_concurrency: sizes of the pools that run the parts of
+        a compound query concurrently (created on the first compound query).
+        slow_log: SlowQueryLog recording requests over its threshold, closed by
+        close(); defaults to the shared SlowQueryLog.from_env() log (off unless
+        ENERGY_SLOW_LOG is set), which stays open for other pipelines.
+        """
+        self.intent_agent = intent_agent
+        self.analysis_agent = analysis_agent
+        self.structured_report_agent = structured_report_agent
+        self._unstructured_report_agent = unstructured_report_agent
+        self._unstructured_factory = unstructured_factory
+        self._factory_lock = threading.Lock()
+        self.sql_workers = sql_workers
+        self.llm_concurrency = llm_concurrency
+        self._pools = None
+        self.slow_log = slow_log if slow_log is not None else SlowQueryLog.from_env()
+
+    @property
+    def unstructured_report_agent(self):
+        if self._unstructured_report_agent is None and self._unstructured_factory is not None:
+            with self._factory_lock:
+                if self._unstructured_report_agent is None:
+                    self._unstructured_report_agent = self._unstructured_factory()
+        return self._unstructured_report_agent
+
+    def parse(self, query):
+        return self.intent_agent.parse(query)
+
+    def parse_compound(self, query):
+        with stage("parse"):
+            intents = self.intent_agent.parse_compound(query)
+        trace = current_trace()
+        if trace is not None:
+            trace.set_intents(intents)
+        return intents
+
+    def run_structured(self, query, intent):
+        """SQL-backed actions: AnalysisAgent query + template report (no LLM)."""
+        action = intent.get("action")
+        region = intent.get("region")
+        start_date = intent.get("start_date")
+        end_date = intent.get("end_date")
+        analysis_agent = self.analysis_agent
+        structured_report_agent = self.structured_report_agent
+
+        if action == "peak_demand":
+            query_lower = query.lower()
+            if intent.get("top_n") or "each region" in query_lower or "by region" in query_lower \
+                    or "all regions" in query_lower:
+                # Top-N peak days per region (and per period) in one windowed query
+                result_data = analysis_agent.run_intent(dict(intent, action="top_peaks"))
+                return structured_report_agent.generate_report(result_data, query)
+
+        if action in ("peak_demand", "all_demands", "total_demand", "average_demand"):
+            # One compiled SQL plan: any number of regions, year/date range, granularity
+            result_data = analysis_agent.run_intent(intent)
+            return structured_report_agent.generate_report(result_data, query)
+
+        if action in ("average_outage_duration", "structured_outage_summary"):
+            result_data = analysis_agent.run_intent(intent)
+            return structured_report_agent.generate_outage_summary(result_data, query)
+
+        if action == "outage_demand":
+            result_data = analysis_agent.compare_outage_day_demand(intent.get("regions") or region, start_date, end_date)
+            return structured_report_agent.generate_outage_demand_report(result_data, query)
+
+        if action == "anomaly_detection":
+            result_data = analysis_agent.run_anomaly_detection()
+            return structured_report_agent.simple_text_report(result_data)
+
+        return UNKNOWN_QUERY_MESSAGE
+
+    def run_unstructured(self, query, intent):
+        """Retrieval + LLM summarization of outage reports."""
+        return self.unstructured_report_agent.query_outage_reports(
+            query, intent.get("region"), intent.get("start_date"), intent.get("end_date")
+        )
+
+    def answer_intent(self, query, intent):
+        action = intent.get("action")
+        if action in STRUCTURED_ACTIONS:
+            with stage("structured"):
+                return self.run_structured(query, intent)
+        if action in UNSTRUCTURED_ACTIONS:
+            with stage("unstructured"):
+                return self.run_unstructured(query, intent)
+        return UNKNOWN_QUERY_MESSAGE
+
+    def answer(self, query):
+        if self.slow_log is None:
+            return self._answer(query)
+        with self.slow_log.trace(query):
+            return self._answer(query)
+
+    def _answer(self, query):
+        intents = self.parse_compound(query)
+        if len(intents) == 1:
+            return self.answer_intent(query, intents[0])
+        return self.answer_compound(query, intents)
+
+    # -------------------------------
+    # Compound queries: sub-intents run concurrently, answers merged in order
+    # -------------------------------
+    def _get_pools(self):
+        if self._pools is None:
+            with self._factory_lock:
+                if self._pools is None:
+                    self._pools = {
+                        "sql": ThreadPoolExecutor(max_workers=self.sql_workers, thread_name_prefix="pipeline-sql"),
+                        "llm": ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix="pipeline-llm"),
+                    }
+        return self._pools
+
+    def _answer_part(self, query, intent):
+        try:
+            return self.answer_intent(intent.get("query") or query, intent)
+        except Exception as e:
+            return f"Could not answer this part: {e}"
+
+    @staticmethod
+    def pool_for(intent):
+        """'llm' for retrieval + LLM sub-queries, 'sql' for everything else."""
+        return "llm" if intent.get("action") in UNSTRUCTURED_ACTIONS else "sql"
+
+    def answer_compound(self, query, intents):
+        """Blocking entry point (CLI, Streamlit): submits every part, then waits for all."""
+        pools = self._get_pools()
+        futures = [pools[self.pool_for(intent)].submit(in_context(self._answer_part, query, intent))
+                   for intent in intents]
+        return self.merge_answers(intents, [future.result() for future in futures])
+
+    async def answer_compound_async(self, query, intents, sql_pool=None, llm_pool=None):
+        """Event-loop entry point (query service): parts are awaited together on the given pools."""
+        loop = asyncio.get_running_loop()
+        pools = {"sql": sql_pool, "llm": llm_pool}
+        if sql_pool is None or llm_pool is None:
+            pools = self._get_pools()
+        answers = await asyncio.gather(*[
+            loop.run_in_executor(pools[self.pool_for(intent)], in_context(self._answer_part, query, intent))
+            for intent in intents
+        ])
+        return self.merge_answers(intents, answers)
+
+    @staticmethod
+    def merge_answers(intents, answers):
+        if len(answers) == 1:
+            return answers[0]
+        sections = []
+        for intent, answer in zip(intents, answers):
+            title = SECTION_TITLES.get(intent.get("action"), "Answer")
+            regions = intent.get("regions") or ([intent["region"]] if intent.get("region") else [])
+            if regions:
+                title = f"{title} ({', '.join(regions)})"
+            sections.append(f"{title}:\n{answer}")
+        return "\n\n".join(sections)
+
+    def close(self):
+        if self._pools is not None:
+            for pool in self._pools.values():
+                pool.shutdown(wait=True)
+            self._pools = None
+        if self.slow_log is not None and not self.slow_log.is_shared():
+            self.slow_log.close()
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# -----------------------------------------------------------------------------------
+#  Cold-start profiler for the entry points.
+#  1. Import time per module, measured with `python -X importtime` in a fresh
+#     interpreter for each agent module.
+#  2. Initialization time per agent and for a first SQL-only query, measured
+#     in a fresh child process, plus that child's total wall-clock time.
+#
+#  Usage:
+#    python -m energy_agentic_ai.profile_startup [--data-dir data] [--top 15]
+# -----------------------------------------------------------------------------------
+
+MODULES = [
+    "energy_agentic_ai.utils",
+    "energy_agentic_ai.agents.intent_agent",
+    "energy_agentic_ai.agents.analysis_agent",
+    "energy_agentic_ai.agents.structured_report_agent",
+    "energy_agentic_ai.agents.data_agent",
+    "energy_agentic_ai.agents.unstructured_report_agent",
+    "energy_agentic_ai.pipeline",
+]
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SQL_ONLY_QUERY = "What was the total demand in 2023?"
+
+
+def _child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    return env
+
+
+def import_times(module):
+    """Returns (cumulative_ms, [(package, cumulative_ms), ...] for the module's direct imports)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_child_env(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    # Children are printed before their parent, indented two spaces per level
+    children = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        if depth == 1:
+            if name.strip() == module:
+                return int(cumulative) / 1000, children
+            children = []
+        elif depth == 3:
+            children.append((name.strip(), int(cumulative) / 1000))
+    raise RuntimeError(f"No import timing found for {module}")
+
+
+def profile_imports(top=15):
+    report = {}
+    for module in MODULES:
+        try:
+            total, children = import_times(module)
+        except RuntimeError as e:
+            report[module] = {"error": str(e)}
+            continue
+        heaviest = sorted(children, key=lambda item: -item[1])[:top]
+        report[module] = {
+            "cumulative_ms": round(total, 1),
+            "heaviest": {name: round(ms, 1) for name, ms in heaviest},
+        }
+    return report
+
+
+def _timed(timings, label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings[label] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def run_child(data_dir):
+    """Runs inside the fresh child process: imports, agent init and one SQL-only query."""
+    timings = {}
+    pipeline_module = _timed(timings, "import pipeline", __import__, "energy_agentic_ai.pipeline", fromlist=["*"])
+    data_module = _timed(timings, "import data_agent", __import__, "energy_agentic_ai.agents.data_agent", fromlist=["*"])
+    analysis_module = _timed(timings, "import analysis_agent", __import__, "energy_agentic_ai.agents.analysis_agent", fromlist=["*"])
+    report_module = _timed(timings, "import structured_report_agent", __import__, "energy_agentic_ai.agents.structured_report_agent", fromlist=["*"])
+    intent_module = _timed(timings, "import intent_agent", __import__, "energy_agentic_ai.agents.intent_agent", fromlist=["*"])
+
+    with open(os.path.join(data_dir, "consumption.csv")) as consumption_file, \
+            open(os.path.join(data_dir, "outages.csv")) as outage_file:
+        data_agent = _timed(timings, "init DataAgent", data_module.DataAgent, consumption_file, outage_file, embed=False)
+    analysis_agent = _timed(timings, "init AnalysisAgent", analysis_module.AnalysisAgent,
+                            data_agent.consumption_df, data_agent.outage_df)
+    structured_report_agent = _timed(timings, "init StructuredReportAgent", report_module.StructuredReportAgent)
+    region_list = sorted(data_agent.consumption_df['Region'].unique().tolist())
+    intent_agent = _timed(timings, "init IntentAgent", intent_module.IntentAgent, region_list=region_list)
+
+    pipeline = pipeline_module.QueryPipeline(intent_agent, analysis_agent, structured_report_agent)
+    _timed(timings, "first SQL-only query", pipeline.answer, SQL_ONLY_QUERY)
+    heavy = ["torch", "sentence_transformers", "langchain_core", "chromadb", "huggingface_hub"]
+    return {"timings_ms": timings, "heavy_modules_loaded": [m for m in heavy if m in sys.modules]}
+
+
+def profile_cold_start(data_dir):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "energy_agentic_ai.profile_startup", "--child", "--data-dir", data_dir],
+        capture_output=True, text=True, env=_child_env(),
+    )
+    wall_ms = round((time.perf_counter() - start) * 1000, 1)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed"}
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report["process_wall_ms"] = wall_ms
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Profile import and initialization time of the agents.")
+    arg_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    arg_parser.add_argument("--top", type=int, default=10, help="Heaviest direct imports to list per module.")
+    arg_parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        result = run_child(args.data_dir)
+        print(json.dumps(result))
+        return
+
+    report = {"imports": profile_imports(args.top), "cold_start_sql_only": profile_cold_start(args.data_dir)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from energy_agentic_ai.pipeline import QueryPipeline, STRUCTURED_ACTIONS, UNSTRUCTURED_ACTIONS, UNKNOWN_QUERY_MESSAGE
+from energy_agentic_ai.slow_log import SlowQueryLog, in_context
+
+sys.path.append('/content')
+
+# -----------------------------------------------------------------------------------
+#  Local asyncio HTTP/JSON query service.
+#    POST /query   {"query": "..."}  ->  {"answer", "action", "intent", "elapsed_ms"}
+#    GET  /health
+#    GET  /stats
+#  Structured (SQL) queries run in a worker thread pool; retrieval + LLM
+#  queries are awaited concurrently on a separate I/O pool so slow LLM calls
+#  never starve SQL work. SIGINT/SIGTERM stop accepting connections and drain
+#  in-flight requests before exiting. Compound queries fan out across both
+#  pools and their answers are merged into one report. With --slow-log,
+#  requests over --slow-threshold seconds are written to a JSONL slow log.
+#
+#  Usage:
+#    python -m energy_agentic_ai.query_service --port 8080 --data-dir data --vector-backend mmap
+# -----------------------------------------------------------------------------------
+
+MAX_BODY_BYTES = 1 << 20
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+               500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class QueryService:
+    def __init__(self, pipeline, sql_workers=None, llm_concurrency=32):
+        self.pipeline = pipeline
+        self.sql_pool = ThreadPoolExecutor(max_workers=sql_workers or os.cpu_count(), thread_name_prefix="sql")
+        self.llm_pool = ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix="llm")
+        self.server = None
+        self.accepting = True
+        self.connections = {}
+        self.active_requests = 0
+        self.stats = {"requests": 0, "structured": 0, "unstructured": 0, "compound": 0, "errors": 0}
+
+    # -------------------------------
+    # Query handling
+    # -------------------------------
+    async def answer(self, query):
+        loop = asyncio.get_running_loop()
+        intents = self.pipeline.parse_compound(query)
+        if len(intents) > 1:
+            # Fan out: SQL parts on the SQL pool, retrieval + LLM parts on the I/O pool
+            self.stats["compound"] += 1
+            answer = await self.pipeline.answer_compound_async(query, intents, self.sql_pool, self.llm_pool)
+            return {"answer": answer, "action": "compound", "intents": intents}
+
+        intent = intents[0]
+        action = intent.get("action")
+        if action in STRUCTURED_ACTIONS:
+            self.stats["structured"] += 1
+            answer = await loop.run_in_executor(self.sql_pool, in_context(self.pipeline.answer_intent, query, intent))
+        elif action in UNSTRUCTURED_ACTIONS:
+            self.stats["unstructured"] += 1
+            answer = await loop.run_in_executor(self.llm_pool, in_context(self.pipeline.answer_intent, query, intent))
+        else:
+            answer = UNKNOWN_QUERY_MESSAGE
+        return {"answer": answer, "action": action, "intent": intent}
+
+    async def handle_query(self, body):
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return 400, {"error": "Body must be JSON."}
+        query = payload.get("query") if isinstance(payload, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"error": "Missing 'query'."}
+
+        start = time.perf_counter()
+        slow_log = self.pipeline.slow_log
+        if slow_log is None:
+            result = await self.answer(query)
+        else:
+            # The request's work runs on the pools, so the event loop thread is not profiled
+            with slow_log.trace(query, in_thread=False):
+                result = await self.answer(query)
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return 200, result
+
+    def get_stats(self):
+        stats = dict(self.stats, in_flight=self.active_requests, connections=len(self.connections))
+        analysis_agent = self.pipeline.analysis_agent
+        unstructured_report_agent = self.pipeline.unstructured_report_agent
+        if analysis_agent is not None:
+            stats["analysis_coalescing"] = analysis_agent.get_coalescing_stats()
+            stats["query_plans"] = analysis_agent.get_compiler_stats()
+        if unstructured_report_agent is not None:
+            stats["llm_coalescing"] = unstructured_report_agent.get_coalescing_stats()
+            stats["query_cache"] = unstructured_report_agent.get_query_cache_stats()
+        if self.pipeline.slow_log is not None:
+            stats["slow_log"] = self.pipeline.slow_log.get_stats()
+        return stats
+
+    async def dispatch(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok" if self.accepting else "draining"}
+        if method == "GET" and path == "/stats":
+            return 200, self.get_stats()
+        if method == "POST" and path == "/query":
+            if not self.accepting:
+                return 503, {"error": "Shutting down."}
+            return await self.handle_query(body)
+        return 404, {"error": f"No route for {method} {path}"}
+
+    # -------------------------------
+    # HTTP/1.1 plumbing (keep-alive, Content-Length bodies)
+    # -------------------------------
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while self.accepting:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self.write_response(writer, 400, {"error": "Malformed request line."}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.write_response(writer, 400, {"error": "Invalid Content-Length."}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self.write_response(writer, 413, {"error": "Body too large."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.stats["requests"] += 1
+                self.active_requests += 1
+                try:
+                    status, payload = await self.dispatch(method.upper(), target.split("?", 1)[0], body)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    status, payload = 500, {"error": str(e)}
+                finally:
+                    self.active_requests -= 1
+
+                keep_alive = headers.get("connection", "").lower() != "close" and self.accepting
+                await self.write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections.pop(task, None)
+            writer.close()
+
+    @staticmethod
+    async def write_response(writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # -------------------------------
+    # Lifecycle
+    # -------------------------------
+    async def serve(self, host="127.0.0.1", port=8080, drain_timeout=30.0):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+
+        print(f"🚀 Query service listening on http://{host}:{port}")
+        await stop.wait()
+        await self.shutdown(drain_timeout)
+
+    async def shutdown(self, drain_timeout=30.0):
+        """Stop accepting, let in-flight requests finish, then release the worker pools and the pipeline."""
+        print("🛑 Shutting down: draining in-flight requests...")
+        loop = asyncio.get_running_loop()
+        self.accepting = False
+        self.server.close()
+        deadline = loop.time() + drain_timeout
+        while self.active_requests and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        # Remaining connections are idle keep-alives (or past the drain deadline)
+        for writer in list(self.connections.values()):
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+        self.sql_pool.shutdown(wait=True)
+        self.llm_pool.shutdown(wait=True)
+        # Closes a --slow-log log; the shared ENERGY_SLOW_LOG one stays open until exit
+        self.pipeline.close()
+        print("✅ Query service stopped.")
+
+
+def build_pipeline(data_dir, vector_backend="chroma", index_path=None, duckdb_threads=None, slow_log=None):
+    from energy_agentic_ai.agents.data_agent import DataAgent
+    from energy_agentic_ai.agents.analysis_agent import AnalysisAgent
+    from energy_agentic_ai.agents.structured_report_agent import StructuredReportAgent
+    from energy_agentic_ai.agents.unstructured_report_agent import UnstructuredReportAgent
+    from energy_agentic_ai.agents.intent_agent import IntentAgent
+
+    index_path = os.path.abspath(index_path or ("outage_index" if vector_backend == "mmap" else "chroma_db"))
+    with open(os.path.join(data_dir, "consumption.csv")) as consumption_file, \
+            open(os.path.join(data_dir, "outages.csv")) as outage_file:
+        data_agent = DataAgent(consumption_file, outage_file, vector_backend=vector_backend, persist_dir=index_path)
+    if data_agent.consumption_df is None or data_agent.outage_df is None:
+        raise RuntimeError(f"Could not load data from {data_dir}")
+
+    analysis_agent = AnalysisAgent(data_agent.consumption_df, data_agent.outage_df, threads=duckdb_threads)
+    structured_report_agent = StructuredReportAgent()
+    unstructured_report_agent = UnstructuredReportAgent(
+        chroma_path=index_path, index_path=index_path, vector_backend=vector_backend
+    )
+    region_list = sorted(data_agent.consumption_df['Region'].unique().tolist())
+    intent_agent = IntentAgent(region_list=region_list)
+    return QueryPipeline(intent_agent, analysis_agent, structured_report_agent, unstructured_report_agent,
+                         slow_log=slow_log)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Asyncio HTTP/JSON service for the energy agents.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    arg_parser.add_argument("--vector-backend", choices=["chroma", "mmap"], default="chroma")
+    arg_parser.add_argument("--index-path", default=None)
+    arg_parser.add_argument("--sql-workers", type=int, default=None)
+    arg_parser.add_argument("--llm-concurrency", type=int, default=32)
+    arg_parser.add_argument("--duckdb-threads", type=int, default=None)
+    arg_parser.add_argument("--drain-timeout", type=float, default=30.0)
+    arg_parser.add_argument("--slow-log", help="JSONL file for requests slower than --slow-threshold.")
+    arg_parser.add_argument("--slow-threshold", type=float, default=2.0, help="Seconds.")
+    arg_parser.add_argument("--slow-profile", choices=["cprofile", "sample"], default=None)
+    args = arg_parser.parse_args()
+
+    slow_log = None
+    if args.slow_log:
+        slow_log = SlowQueryLog(args.slow_log, threshold=args.slow_threshold, profile=args.slow_profile)
+    pipeline = build_pipeline(args.data_dir, args.vector_backend, args.index_path, args.duckdb_threads, slow_log)
+    service = QueryService(pipeline, sql_workers=args.sql_workers, llm_concurrency=args.llm_concurrency)
+    asyncio.run(service.serve(args.host, args.port, args.drain_timeout))
+
+
+if __name__ == "__main__":
+    main()
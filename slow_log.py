@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('/content')
+
+# -----------------------------------------------------------------------------------
+#  Opt-in slow-query log. While a request runs under SlowQueryLog.trace(),
+#  the agents attach what they did to the active QueryTrace (a contextvar):
+#    - parsed intents and per-stage timings (QueryPipeline)
+#    - every SQL statement with its parameters, rows and time (AnalysisAgent)
+#    - retrieval hits and LLM calls (UnstructuredReportAgent)
+#  Requests slower than the threshold are written as one JSON line to a
+#  rotating log, with the DuckDB EXPLAIN ANALYZE profile of each statement
+#  and optionally a cProfile or sampled-stack dump. With no log configured
+#  the agents only pay one ContextVar lookup per call.
+#
+#  Enable with QueryPipeline(..., slow_log=SlowQueryLog("slow_queries.jsonl"))
+#  or the environment:
+#    ENERGY_SLOW_LOG=slow_queries.jsonl ENERGY_SLOW_LOG_THRESHOLD=2.0 ENERGY_SLOW_LOG_PROFILE=sample
+# -----------------------------------------------------------------------------------
+
+PROFILE_MODES = (None, "cprofile", "sample")
+# Longest list parameter (e.g. pruned Parquet file lists) written out in full
+MAX_PARAM_ITEMS = 20
+
+_current_trace = contextvars.ContextVar("energy_slow_log_trace", default=None)
+
+# SlowQueryLog.from_env() instances, one per log path; closed at interpreter exit
+_shared_logs = {}
+_shared_lock = threading.Lock()
+
+
+def current_trace():
+    """The QueryTrace of the request running in this context, or None when not tracing."""
+    return _current_trace.get()
+
+
+def in_context(fn, *args):
+    """
+    Zero-argument callable for an executor that runs fn(*args) in a copy of
+    the caller's context, so parts of a traced request running on worker
+    threads still report to its trace. Without a trace: fn bound to args.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return lambda: fn(*args)
+    context = contextvars.copy_context()
+    return lambda: context.run(trace.run_in_thread, fn, *args)
+
+
+def stage(name):
+    """Context manager timing a pipeline stage of the active trace (no-op when not tracing)."""
+    trace = _current_trace.get()
+    return trace.stage(name) if trace is not None else nullcontext()
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def _jsonable_params(params):
+    values = []
+    for value in params or []:
+        if isinstance(value, (list, tuple)) and len(value) > MAX_PARAM_ITEMS:
+            value = f"<{len(value)} items>"
+        values.append(value)
+    return values
+
+
+def _start_cprofile():
+    """An enabled cProfile.Profile for this thread, or None if another profiler is active."""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+class QueryTrace:
+    """What one request did; filled in by the agents while it runs."""
+
+    def __init__(self, query):
+        self.query = query
+        self.started = time.perf_counter()
+        self.wall_start = datetime.now(timezone.utc)
+        self.intents = None
+        self.stages = {}
+        self.sql = []
+        self.retrieval = []
+        self.llm = []
+        self.error = None
+        self.threads = {threading.get_ident()}
+        # cProfile.Profile per thread that worked on the request (profile="cprofile")
+        self.cprofile = False
+        self.profilers = []
+        self._lock = threading.Lock()
+
+    def set_intents(self, intents):
+        self.intents = intents
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage; repeated stages (compound parts) add up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add_sql(self, sql, params, elapsed, rows, explain=None):
+        """explain: optional zero-argument callable returning the EXPLAIN ANALYZE text (run only if logged)."""
+        with self._lock:
+            self.sql.append({"sql": " ".join(sql.split()), "params": _jsonable_params(params),
+                             "rows": rows, "ms": _ms(elapsed), "_explain": explain})
+
+    def add_retrieval(self, query, region, start_date, end_date, hits, elapsed):
+        with self._lock:
+            self.retrieval.append({"query": query, "region": region, "start_date": start_date,
+                                   "end_date": end_date, "hits": hits, "ms": _ms(elapsed)})
+
+    def add_llm(self, backend, elapsed, prompt_chars, output_chars):
+        with self._lock:
+            self.llm.append({"backend": backend, "ms": _ms(elapsed),
+                             "prompt_chars": prompt_chars, "output_chars": output_chars})
+
+    def run_in_thread(self, fn, *args):
+        """Run fn on a worker thread as part of this request (that thread is sampled / profiled too)."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self.threads.add(thread_id)
+        profiler = _start_cprofile() if self.cprofile else None
+        try:
+            return fn(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            with self._lock:
+                self.threads.discard(thread_id)
+                if profiler is not None:
+                    self.profilers.append(profiler)
+
+    def to_entry(self, elapsed, threshold, explain=True):
+        sql = []
+        for statement in self.sql:
+            statement = dict(statement)
+            explain_fn = statement.pop("_explain")
+            if explain and explain_fn is not None:
+                try:
+                    statement["explain_analyze"] = explain_fn()
+                except Exception as e:
+                    statement["explain_analyze"] = f"EXPLAIN ANALYZE failed: {e}"
+            sql.append(statement)
+        entry = {
+            "ts": self.wall_start.isoformat(),
+            "query": self.query,
+            "elapsed_ms": _ms(elapsed),
+            "threshold_ms": _ms(threshold),
+            "intents": self.intents,
+            "stages_ms": {name: _ms(seconds) for name, seconds in self.stages.items()},
+            "sql": sql,
+            "retrieval": self.retrieval,
+            "llm": self.llm,
+        }
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+
+class _StackSampler:
+    """
+    Samples the Python stacks of a trace's threads every `interval` seconds
+    from a daemon thread; results are folded stacks ("outer;...;inner")
+    with sample counts, as used by flame-graph tools.
+    """
+
+    def __init__(self, trace, interval=0.005):
+        self.trace = trace
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="slow-log-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.trace._lock:
+                threads = set(self.trace.threads)
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    self.counts[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def dump(self, top=30):
+        return {
+            "interval_ms": _ms(self.interval),
+            "samples": self.samples,
+            "stacks": [{"stack": stack, "samples": count} for stack, count in self.counts.most_common(top)],
+        }
+
+
+class SlowQueryLog:
+    def __init__(self, path="slow_queries.jsonl", threshold=2.0, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 explain=True, profile=None, sample_interval=0.005):
+        """
+        path: JSONL file, rotated at max_bytes with backup_count old files kept.
+        threshold: seconds; slower requests are logged.
+        explain: re-run each logged SQL statement under EXPLAIN ANALYZE.
+        profile: None, "cprofile" (deterministic, per thread working on the
+        request, noticeable overhead) or "sample" (stacks of the request's
+        threads sampled every sample_interval seconds). Profiles are
+        collected for every traced request but only written for slow ones.
+        Entries are written by a background thread, off the request path.
+        """
+        if profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile}")
+        self.path = path
+        self.threshold = threshold
+        self.explain = explain
+        self.profile = profile
+        self.sample_interval = sample_interval
+        self.stats = {"traced": 0, "logged": 0}
+        self._lock = threading.Lock()
+        self._logger = logging.Logger(f"energy_agentic_ai.slow_log:{path}")
+        self._logger.propagate = False
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-log")
+
+    @classmethod
+    def from_env(cls):
+        """
+        SlowQueryLog configured from ENERGY_SLOW_LOG* variables, or None when
+        ENERGY_SLOW_LOG is unset. Every call for the same path returns the same
+        shared instance (one file handler and writer thread per file), which
+        is closed at interpreter exit rather than by its users.
+        """
+        path = os.environ.get("ENERGY_SLOW_LOG")
+        if not path:
+            return None
+        key = os.path.abspath(path)
+        with _shared_lock:
+            slow_log = _shared_logs.get(key)
+            if slow_log is None:
+                if not _shared_logs:
+                    atexit.register(_close_shared_logs)
+                slow_log = _shared_logs[key] = cls(
+                    path,
+                    threshold=float(os.environ.get("ENERGY_SLOW_LOG_THRESHOLD", "2.0")),
+                    explain=os.environ.get("ENERGY_SLOW_LOG_EXPLAIN", "1") != "0",
+                    profile=os.environ.get("ENERGY_SLOW_LOG_PROFILE") or None,
+                )
+            return slow_log
+
+    def is_shared(self):
+        """True for the from_env() instances, which are closed at exit instead of by close() callers."""
+        with _shared_lock:
+            return any(slow_log is self for slow_log in _shared_logs.values())
+
+    @contextmanager
+    def trace(self, query, in_thread=True):
+        """
+        Trace one request. in_thread=False when the request is an asyncio
+        task whose work runs on executor threads through in_context() (query
+        service): the event loop thread is then neither profiled nor sampled.
+        """
+        trace = QueryTrace(query)
+        trace.cprofile = self.profile == "cprofile"
+        if not in_thread:
+            trace.threads.clear()
+        token = _current_trace.set(trace)
+        profiler = sampler = None
+        if trace.cprofile and in_thread:
+            profiler = _start_cprofile()
+        elif self.profile == "sample":
+            sampler = _StackSampler(trace, self.sample_interval)
+            sampler.start()
+        try:
+            yield trace
+        except Exception as e:
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - trace.started
+            if profiler is not None:
+                profiler.disable()
+                trace.profilers.append(profiler)
+            if sampler is not None:
+                sampler.stop()
+            _current_trace.reset(token)
+            with self._lock:
+                self.stats["traced"] += 1
+            if elapsed >= self.threshold:
+                with self._lock:
+                    self.stats["logged"] += 1
+                self._writer.submit(self._write, trace, elapsed, sampler)
+
+    def _write(self, trace, elapsed, sampler=None):
+        try:
+            entry = trace.to_entry(elapsed, self.threshold, self.explain)
+            if trace.profilers:
+                entry["profile"] = self._cprofile_dump(trace.profilers)
+            if sampler is not None:
+                entry["profile"] = sampler.dump()
+            self._logger.info(json.dumps(entry, default=str, ensure_ascii=False))
+        except Exception as e:
+            print(f"⚠️ Could not write slow query log entry: {e}")
+
+    @staticmethod
+    def _cprofile_dump(profilers, top=30):
+        """Top functions by cumulative time, merged over every profiled thread."""
+        import io
+        import pstats
+
+        out = io.StringIO()
+        stats = pstats.Stats(profilers[0], stream=out)
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.sort_stats("cumulative").print_stats(top)
+        return {"threads": len(profilers), "cprofile": out.getvalue()}
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, threshold_ms=_ms(self.threshold), path=self.path)
+
+    def close(self):
+        """Wait for pending entries, then close the log file."""
+        self._writer.shutdown(wait=True)
+        for handler in self._logger.handlers:
+            handler.close()
+
+
+def _close_shared_logs():
+    with _shared_lock:
+        slow_logs = list(_shared_logs.values())
+        _shared_logs.clear()
+    for slow_log in slow_logs:
+        slow_log.close()
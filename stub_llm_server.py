@@ -0,0 +1,91 @@
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -----------------------------------------------------------------------------------
+#  Local OpenAI-compatible stand-in for the hosted LLM.
+#  Answers POST /v1/chat/completions after a configurable delay so that load
+#  tests and benchmarks can run offline with controllable latency.
+#
+#  Usage:
+#    python -m energy_agentic_ai.stub_llm_server --port 8808 --latency 0.25 --jitter 0.05
+#    export ENERGY_LLM_BACKEND=openai ENERGY_LLM_BASE_URL=http://127.0.0.1:8808/v1
+# -----------------------------------------------------------------------------------
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse sockets
+    latency = 0.0
+    jitter = 0.0
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/models"):
+            self._send_json(200, {"status": "ok", "data": [{"id": "stub"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+
+        user_messages = [m.get("content", "") for m in request.get("messages", []) if m.get("role") == "user"]
+        question = user_messages[-1].splitlines()[0] if user_messages and user_messages[-1] else ""
+        self._send_json(200, {
+            "id": "stub-completion",
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Stub answer for: {question}"[:200]},
+                "finish_reason": "stop",
+            }],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=8808, latency=0.0, jitter=0.0):
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {"latency": latency, "jitter": jitter})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Local OpenAI-compatible LLM stand-in.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8808)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering.")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter in seconds.")
+    args = arg_parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.jitter)
+    print(f"🚀 Stub LLM listening on http://{args.host}:{args.port}/v1 (latency={args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from dateutil import parser
 import pandas as pd
 
@@ -10,7 +10,7 @@ def normalize_datetime(date_input, output_format="%d-%b-%Y"):
     if pd.isna(date_input) or str(date_input).strip() == "":
         return None
 
-    if isinstance(date_input, datetime):
+    if isinstance(date_input, (datetime, date)):
         return date_input.strftime(output_format)
 
     try:
@@ -18,3 +18,13 @@ def normalize_datetime(date_input, output_format="%d-%b-%Y"):
         return dt.strftime(output_format)
     except Exception:
         return None
+
+
+def date_column_sql(df, column="Date"):
+    """
+    DuckDB expression turning df[column] into a DATE: compact frames already
+    hold dates, legacy frames hold '%d-%b-%Y' strings.
+    """
+    if pd.api.types.is_string_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
+        return f"CAST(TRY_STRPTIME({column}, '%d-%b-%Y') AS DATE)"
+    return f"CAST({column} AS DATE)"